@@ -17,12 +17,21 @@ See the 'Arrival generation algorithms' and 'Elevator moving algorithsm'
 sections of the assignment handout for a complete description of each algorithm
 you are expected to implement in this file.
 """
+from bisect import bisect_left
+from collections import OrderedDict
 import csv
 from enum import Enum
+import math
 import random
-from typing import Dict, List, Optional
+from typing import Any, Callable, Dict, Hashable, Iterator, List, Optional, \
+    TextIO, Tuple, Union
 
-from entities import Person, Elevator
+from entities import Person, Elevator, WaitingQueues
+
+try:
+    import numpy
+except ImportError:
+    numpy = None
 
 
 ###############################################################################
@@ -65,6 +74,58 @@ class ArrivalGenerator:
         """
         raise NotImplementedError
 
+    def draw(self, round_num: int) -> Tuple[List[int], List[int]]:
+        """Return the start floors and the target floors of the people
+        arriving at the given round, as two lists in the same order.
+
+        This is used where only the floors are needed, so that subclasses
+        able to produce them directly can avoid creating Person objects.
+        """
+        starts = []
+        targets = []
+        for people in self.generate(round_num).values():
+            for person in people:
+                starts.append(person.start)
+                targets.append(person.target)
+        return starts, targets
+
+    @staticmethod
+    def _group_by_start(starts: List[int],
+                        targets: List[int]) -> Dict[int, List[Person]]:
+        """Return a new Person for each pair of start and target floor,
+        grouped by start floor in the format returned by generate.
+
+        Floors where no one starts are left out.
+        """
+        generated = {}
+        for start, target in zip(starts, targets):
+            if start in generated:
+                generated[start].append(Person(start, target))
+            else:
+                generated[start] = [Person(start, target)]
+        return generated
+
+    def next_arrival_round(self, round_num: int) -> Optional[int]:
+        """Return the first round at or after the given round in which people
+        may arrive, or None if no one will arrive from then on.
+
+        This lets a simulation skip over rounds where nothing happens. It is
+        always correct to return round_num, which is what this default does.
+        """
+        return round_num
+
+    def get_state(self) -> Any:
+        """Return the picklable state this generator needs to carry on from
+        where it is in a restored simulation, or None if it needs none.
+
+        Generators that look arrivals up by round number need no state.
+        """
+        return None
+
+    def set_state(self, state: Any) -> None:
+        """Restore the state returned by get_state.
+        """
+
 
 class RandomArrivals(ArrivalGenerator):
     """Generate a fixed number of random people each round.
@@ -121,10 +182,177 @@ class RandomArrivals(ArrivalGenerator):
 
         return generated
 
+    def next_arrival_round(self, round_num: int) -> Optional[int]:
+        """
+        people arrive in every round, unless num_people is None or 0
+        """
+        if not self.num_people:
+            return None
+        return round_num
+
+
+class BatchRandomArrivals(ArrivalGenerator):
+    """Generate a fixed number of random people each round, drawing the
+    floors for a whole block of rounds at once.
+
+    Generate 0 people if self.num_people is None.
+
+    The (start, target) pairs are drawn with NumPy when it is installed, or
+    with the random module otherwise. Each block of rounds is drawn from its
+    own generator seeded by (seed, block number), so the people arriving in
+    a given round depend only on the seed, block_rounds and the round number,
+    not on which rounds were generated before it. Two generators with the
+    same seed but different block_rounds draw different people, as do the
+    two backends.
+
+    A block holds block_rounds * num_people start floors and as many target
+    floors, as 8 byte integers with NumPy. By default, block_rounds is 64,
+    cut down so that a block holds at most MAX_BLOCK_PEOPLE people (so at
+    most 1 MiB of floors with NumPy) when num_people is large.
+
+    A target is drawn from the max_floor - 1 floors other than the start,
+    rather than rejection-sampled until it differs from the start.
+
+    === Attributes ===
+    max_floor: The maximum floor number for the building.
+               Generated people should not have a starting or target floor
+               beyond this floor.
+    num_people: The number of people to generate, or None if this is left
+                up to the algorithm itself.
+    seed: the seed all draws are derived from
+    block_rounds: the number of rounds drawn at once
+    MAX_BLOCK_PEOPLE: the most people in a block of the default size
+
+    === Private Attributes ===
+    _block_index: the number of the block currently drawn, or -1 if none is
+    _starts: the start floors drawn for the current block, one row per round
+             (a NumPy array, or a list of lists without NumPy)
+    _targets: the target floors drawn for the current block, one row per round
+              (a NumPy array, or a list of lists without NumPy)
+
+    === Representation Invariants ===
+    max_floor >= 2
+    num_people is None or num_people >= 0
+    block_rounds >= 1
+    """
+    num_people: Optional[int]
+    max_floor: int
+    seed: int
+    block_rounds: int
+    MAX_BLOCK_PEOPLE: int = 65536
+    _block_index: int
+    _starts: Any
+    _targets: Any
+
+    def __init__(self, max_floor: int, num_people: Optional[int],
+                 seed: Optional[int] = None,
+                 block_rounds: Optional[int] = None) -> None:
+        """
+        initialize a BatchRandomArrivals
+        if seed is None, it is drawn from the random module, so that seeding
+        the random module also makes this generator reproducible
+        if block_rounds is None, it is 64, or fewer when more than
+        MAX_BLOCK_PEOPLE people would arrive in 64 rounds
+
+        Precondition:
+            max_floor>=2
+            num_people is None or num_people>=0
+            block_rounds is None or block_rounds>=1
+        """
+        ArrivalGenerator.__init__(self, max_floor, num_people)
+        if seed is None:
+            seed = random.getrandbits(32)
+        if block_rounds is None:
+            block_rounds = max(1, min(
+                64, self.MAX_BLOCK_PEOPLE // max(num_people or 1, 1)))
+        self.seed = seed
+        self.block_rounds = block_rounds
+        self._block_index = -1
+        self._starts = []
+        self._targets = []
+
+    def draw(self, round_num: int) -> Tuple[List[int], List[int]]:
+        """
+        return the start floors and the target floors of the people arriving
+        in round_num, as two lists in the same order
+        """
+        if self.num_people is None or self.num_people == 0:
+            return [], []
+
+        block_index = round_num // self.block_rounds
+        if block_index != self._block_index:
+            self._draw_block(block_index)
+        row = round_num - block_index * self.block_rounds
+        if numpy is not None:
+            return self._starts[row].tolist(), self._targets[row].tolist()
+        return self._starts[row], self._targets[row]
+
+    def generate(self, round_num: int) -> Dict[int, List[Person]]:
+        """
+        create a dict and stores person given by
+        pairs of random start and target drawn for round_num
+        floors where no people arrived are left out
+        """
+        starts, targets = self.draw(round_num)
+        return self._group_by_start(starts, targets)
+
+    def next_arrival_round(self, round_num: int) -> Optional[int]:
+        """
+        people arrive in every round, unless num_people is None or 0
+        """
+        if not self.num_people:
+            return None
+        return round_num
+
+    def get_state(self) -> Any:
+        """
+        return the seed, which is all that is needed to draw the same people
+        """
+        return self.seed
+
+    def set_state(self, state: Any) -> None:
+        """
+        restore the seed returned by get_state
+        """
+        if state != self.seed:
+            self.seed = state
+            self._block_index = -1
+
+    def _draw_block(self, block_index: int) -> None:
+        """
+        draw the floors of every person arriving in block block_index
+        """
+        shape = (self.block_rounds, self.num_people)
+        if numpy is not None:
+            rng = numpy.random.default_rng([self.seed, block_index])
+            starts = rng.integers(1, self.max_floor + 1, size=shape)
+            targets = rng.integers(1, self.max_floor, size=shape)
+            targets += targets >= starts
+            self._starts = starts
+            self._targets = targets
+        else:
+            rng = random.Random(str(self.seed) + ':' + str(block_index))
+            self._starts = []
+            self._targets = []
+            for _ in range(self.block_rounds):
+                starts = [rng.randint(1, self.max_floor)
+                          for _ in range(self.num_people)]
+                targets = [rng.randint(1, self.max_floor - 1)
+                           for _ in range(self.num_people)]
+                self._starts.append(starts)
+                self._targets.append([target + (target >= start) for
+                                      start, target in zip(starts, targets)])
+        self._block_index = block_index
+
 
 class FileArrivals(ArrivalGenerator):
     """Generate arrivals from a CSV file.
 
+    By default the whole file is read when the generator is created. In
+    streaming mode the file is instead read lazily as generate is called
+    with increasing round numbers, and only the current round is kept in
+    memory, so arbitrarily long traces can be replayed.
+
     === Attributes ===
     max_floor: The maximum floor number for the building.
                Generated people should not have a starting or target floor
@@ -132,6 +360,18 @@ class FileArrivals(ArrivalGenerator):
     filename: the name of sample_arrivals we want to import
 
     generate_list: The dict where read data from filename is written to
+                   (in streaming mode, only the most recently generated round)
+
+    === Private Attributes ===
+    _stream: whether the file is read lazily
+    _file: the open file being streamed from, or None if the file is not
+           being streamed or has been read to the end
+    _reader: the csv reader over _file
+    _pending: the next unused line of the file, with its round number
+              already converted to an int, or None if there is none
+    _last_round: the furthest round number the file has been read up to
+    _rounds: the keys of generate_list in ascending order
+             (not used in streaming mode)
 
     === Representation Invariants ===
     max_floor >= 2
@@ -140,19 +380,41 @@ class FileArrivals(ArrivalGenerator):
     filename: str
     max_floor: int
     generate_list: Dict[int, Dict[int, List[Person]]]
-
-    def __init__(self, max_floor: int, filename: str) -> None:
+    _stream: bool
+    _file: Optional[TextIO]
+    _reader: Optional[Iterator[List[str]]]
+    _pending: Optional[List[Union[int, str]]]
+    _last_round: int
+    _rounds: List[int]
+
+    def __init__(self, max_floor: int, filename: str,
+                 stream: bool = False) -> None:
         """Initialize a new FileArrivals algorithm from the given file.
 
         The num_people attribute of every FileArrivals instance is set to None,
         since the number of arrivals depends on the given file.
 
+        If <stream> is True, the file is read lazily by generate instead.
+
         Precondition:
             <filename> refers to a valid CSV file, following the specified
             format and restrictions from the assignment handout.
+            if <stream> is True, the lines of the file are sorted by round
+            number.
         """
         ArrivalGenerator.__init__(self, max_floor, None)
+        self.filename = filename
         self.generate_list = {}
+        self._stream = stream
+        self._file = None
+        self._reader = None
+        self._pending = None
+        self._last_round = -1
+        self._rounds = []
+
+        if stream:
+            self._rewind()
+            return
 
         # We've provided some of the "reading from csv files" boilerplate code
         # for you to help you get started.
@@ -174,16 +436,313 @@ class FileArrivals(ArrivalGenerator):
                         Person(start, target))
                     person_index += 2
 
+        self._rounds = sorted(self.generate_list)
+
     def generate(self, round_num: int) -> Dict[int, List[Person]]:
         """
         take in a round_num and if it's key in generate_list
         then return the value it matches
+        in streaming mode, read forward through the file to round_num first
+        (starting over from the beginning if round_num has already passed)
         """
+        if self._stream:
+            self._read_round(round_num)
+
         if round_num in self.generate_list:
             return self.generate_list[round_num]
         else:
             return {}
 
+    def next_arrival_round(self, round_num: int) -> Optional[int]:
+        """
+        return the first round at or after round_num that has a line in the
+        file, or None if there is none
+        in streaming mode, this reads forward through the file, so asking for
+        a round before round_num afterwards starts the file over
+        """
+        if not self._stream:
+            pos = bisect_left(self._rounds, round_num)
+            if pos == len(self._rounds):
+                return None
+            return self._rounds[pos]
+
+        if round_num in self.generate_list:
+            return round_num
+        if round_num < self._last_round:
+            return round_num
+
+        self._last_round = round_num
+        while self._pending is not None and self._pending[0] < round_num:
+            self._advance()
+        if self._pending is None:
+            return None
+        return self._pending[0]
+
+    def close(self) -> None:
+        """
+        close the file being streamed from, if there is one
+        """
+        if self._file is not None:
+            self._file.close()
+        self._file = None
+        self._reader = None
+        self._pending = None
+
+    def _rewind(self) -> None:
+        """
+        start streaming from the beginning of the file again
+        """
+        self.close()
+        self._file = open(self.filename)
+        self._reader = csv.reader(self._file)
+        self.generate_list = {}
+        self._last_round = -1
+        self._advance()
+
+    def _advance(self) -> None:
+        """
+        make the next line of the file pending, closing the file at its end
+        only the round number of the line is converted here, so lines that
+        are skipped over are never fully parsed
+        """
+        line = next(self._reader, None)
+        if line is None:
+            self.close()
+        else:
+            line[0] = int(line[0])
+            self._pending = line
+
+    def _read_round(self, round_num: int) -> None:
+        """
+        make generate_list hold just the arrivals of round_num, leaving out
+        floors where no one arrived
+        """
+        if round_num in self.generate_list:
+            return
+        if round_num < self._last_round:
+            self._rewind()
+        self._last_round = round_num
+        self.generate_list = {}
+
+        while self._pending is not None and self._pending[0] < round_num:
+            self._advance()
+
+        # as when reading the whole file, a later line for the same round
+        # replaces an earlier one
+        data = None
+        while self._pending is not None and self._pending[0] == round_num:
+            data = self._pending
+            self._advance()
+        if data is None:
+            return
+
+        starts = [int(floor) for floor in data[1:len(data) - 1:2]]
+        targets = [int(floor) for floor in data[2::2]]
+        self.generate_list[round_num] = self._group_by_start(starts, targets)
+
+
+class ProfileArrivals(ArrivalGenerator):
+    """Generate random people following a time-of-day traffic profile.
+
+    The profile is a table of arrival rates: table[slot][start - 1][target - 1]
+    is the expected number of people arriving at floor start each round and
+    going to floor target, during the slot-th part of the day. Each slot lasts
+    rounds_per_slot rounds, and the day repeats after the last slot.
+
+    Each slot's rates are turned into cumulative weights over its (start,
+    target) pairs once, when the generator is created. So a round only draws
+    its number of arrivals (from a Poisson distribution with the slot's total
+    rate, or that rate rounded if poisson is False), then picks each person's
+    pair by bisecting the weights, which takes time in proportion to the
+    number of arrivals rather than to the number of floors squared.
+
+    Each round is drawn from its own generator seeded by (seed, round
+    number), so the people arriving in a round depend only on the seed and
+    the round number.
+
+    === Attributes ===
+    max_floor: The maximum floor number for the building.
+               Generated people should not have a starting or target floor
+               beyond this floor.
+    num_people: always None, since the number of people varies by round
+    rounds_per_slot: the number of rounds each slot of the table lasts
+    poisson: whether the number of arrivals in a round is drawn from a
+             Poisson distribution, rather than being its expected number
+             rounded
+    seed: the seed all draws are derived from
+
+    === Private Attributes ===
+    _pairs: the (start, target) pairs with a positive rate in each slot
+    _cumulative: the cumulative rates of _pairs in each slot
+    _totals: the total rate of each slot
+
+    === Representation Invariants ===
+    max_floor >= 2
+    rounds_per_slot >= 1
+    len(_pairs) == len(_cumulative) == len(_totals) >= 1
+    """
+    num_people: Optional[int]
+    max_floor: int
+    rounds_per_slot: int
+    poisson: bool
+    seed: int
+    _pairs: List[List[Tuple[int, int]]]
+    _cumulative: List[List[float]]
+    _totals: List[float]
+
+    def __init__(self, max_floor: int, table: List[List[List[float]]],
+                 rounds_per_slot: int = 1, poisson: bool = True,
+                 seed: Optional[int] = None) -> None:
+        """
+        initialize a ProfileArrivals following table
+        if seed is None, it is drawn from the random module, so that seeding
+        the random module also makes this generator reproducible
+
+        Precondition:
+            max_floor>=2
+            table is not empty, and each of its slots is a max_floor by
+            max_floor table of rates >= 0, whose diagonal is 0
+            rounds_per_slot>=1
+        """
+        ArrivalGenerator.__init__(self, max_floor, None)
+        if seed is None:
+            seed = random.getrandbits(32)
+        self.seed = seed
+        self.rounds_per_slot = rounds_per_slot
+        self.poisson = poisson
+
+        self._pairs = []
+        self._cumulative = []
+        self._totals = []
+        for rates in table:
+            pairs = []
+            cumulative = []
+            total = 0.0
+            for start in range(1, max_floor + 1):
+                for target in range(1, max_floor + 1):
+                    rate = rates[start - 1][target - 1]
+                    if rate > 0 and start != target:
+                        total += rate
+                        pairs.append((start, target))
+                        cumulative.append(total)
+            self._pairs.append(pairs)
+            self._cumulative.append(cumulative)
+            self._totals.append(total)
+
+    def slot(self, round_num: int) -> int:
+        """
+        return the slot of the table that round_num falls in
+        """
+        return round_num // self.rounds_per_slot % len(self._totals)
+
+    def draw(self, round_num: int) -> Tuple[List[int], List[int]]:
+        """
+        return the start floors and the target floors of the people arriving
+        in round_num, as two lists in the same order
+        """
+        slot = self.slot(round_num)
+        total = self._totals[slot]
+        if total == 0:
+            return [], []
+
+        rng = random.Random(str(self.seed) + ':' + str(round_num))
+        if self.poisson:
+            count = _poisson(rng, total)
+        else:
+            count = int(round(total))
+        pairs = rng.choices(self._pairs[slot],
+                            cum_weights=self._cumulative[slot], k=count)
+        return [start for start, _ in pairs], [target for _, target in pairs]
+
+    def generate(self, round_num: int) -> Dict[int, List[Person]]:
+        """
+        create a dict and stores person given by
+        pairs of start and target drawn for round_num
+        floors where no people arrived are left out
+        """
+        starts, targets = self.draw(round_num)
+        return self._group_by_start(starts, targets)
+
+    def next_arrival_round(self, round_num: int) -> Optional[int]:
+        """
+        return the first round at or after round_num in a slot whose rates
+        are not all 0, or None if every slot's are
+        """
+        for i in range(len(self._totals)):
+            slot_round = (round_num // self.rounds_per_slot + i) * \
+                self.rounds_per_slot
+            if self._totals[self.slot(slot_round)] > 0:
+                return max(round_num, slot_round)
+        return None
+
+    def get_state(self) -> Any:
+        """
+        return the seed, which is all that is needed to draw the same people
+        """
+        return self.seed
+
+    def set_state(self, state: Any) -> None:
+        """
+        restore the seed returned by get_state
+        """
+        self.seed = state
+
+
+def office_day_table(max_floor: int, peak_rate: float) -> \
+        List[List[List[float]]]:
+    """Return a table for ProfileArrivals of a typical office day, in eight
+    slots: the morning up-peak, two quieter slots, the lunch peak, two
+    quieter slots, the evening down-peak, and the night.
+
+    During the up-peak, people arrive at floor 1 at <peak_rate> per round in
+    total, spread evenly over the floors above; during the down-peak, they go
+    down to floor 1 at the same rate. At lunch, half that traffic goes each
+    way. The quieter slots have a tenth of the peak rate of traffic between
+    any two floors, and the night has a hundredth.
+
+    Precondition: max_floor >= 2 and peak_rate >= 0
+    """
+    upper = max_floor - 1
+    num_pairs = max_floor * (max_floor - 1)
+
+    def slot_table(up: float, down: float, between: float) -> \
+            List[List[float]]:
+        """Return the rates of a slot with <up> per round in total going up
+        from floor 1, <down> going down to it, and <between> spread over
+        every pair of floors.
+        """
+        rates = [[between / num_pairs] * max_floor for _ in range(max_floor)]
+        for floor in range(max_floor):
+            rates[floor][floor] = 0.0
+        for floor in range(1, max_floor):
+            rates[0][floor] += up / upper
+            rates[floor][0] += down / upper
+        return rates
+
+    quiet = slot_table(0.0, 0.0, peak_rate / 10)
+    return [slot_table(peak_rate, 0.0, 0.0), quiet, quiet,
+            slot_table(peak_rate / 2, peak_rate / 2, 0.0), quiet, quiet,
+            slot_table(0.0, peak_rate, 0.0),
+            slot_table(0.0, 0.0, peak_rate / 100)]
+
+
+def _poisson(rng: random.Random, mean: float) -> int:
+    """Return a number drawn from the Poisson distribution with the given
+    mean, using rng, in time proportional to the mean.
+    """
+    count = 0
+    # Draw large means in parts, so that exp(-mean) doesn't underflow.
+    while mean > 500:
+        count += _poisson(rng, 500)
+        mean -= 500
+
+    limit = math.exp(-mean)
+    product = rng.random()
+    while product > limit:
+        count += 1
+        product *= rng.random()
+    return count
+
 
 ###############################################################################
 # Elevator moving algorithms
@@ -203,7 +762,34 @@ class Direction(Enum):
 
 class MovingAlgorithm:
     """An algorithm to make decisions for moving an elevator at each round.
+
+    === Attributes ===
+    moves_towards_target: whether this algorithm always moves each elevator
+                          one floor towards the floor given by target_floor
+                          (or keeps it still if that is None). Simulations
+                          use this to predict moves without making them.
     """
+    moves_towards_target: bool = False
+
+    def target_floor(self, elevator: Elevator,
+                     waiting: Dict[int, List[Person]],
+                     max_floor: int) -> Optional[int]:
+        """Return the floor <elevator> is heading for, or None if it should
+        stay where it is.
+
+        Only algorithms whose moves_towards_target is True implement this.
+        """
+        raise NotImplementedError
+
+    def get_state(self) -> Any:
+        """Return the picklable state this algorithm needs to carry on from
+        where it is in a restored simulation, or None if it needs none.
+        """
+        return None
+
+    def set_state(self, state: Any) -> None:
+        """Restore the state returned by get_state.
+        """
 
     @staticmethod
     def get_motion_direction(elevator_floor: int,
@@ -220,6 +806,77 @@ class MovingAlgorithm:
         else:
             return -1
 
+    @staticmethod
+    def lowest_waiting_floor(waiting: Dict[int, List[Person]]) -> \
+            Optional[int]:
+        """
+        return the lowest floor that has someone waiting,
+        or None if no one is waiting
+        uses the occupied floor index when waiting is a WaitingQueues
+        """
+        if isinstance(waiting, WaitingQueues):
+            return waiting.lowest_occupied()
+
+        for floor in waiting:
+            if len(waiting[floor]) > 0:
+                return floor
+        return None
+
+    @staticmethod
+    def nearest_waiting_floor(waiting: Dict[int, List[Person]],
+                              elevator_floor: int) -> Optional[int]:
+        """
+        return the floor closest to elevator_floor that has someone waiting,
+        or None if no one is waiting
+        to break the tie, the floor below elevator_floor is chosen
+        uses the occupied floor index when waiting is a WaitingQueues
+        """
+        if isinstance(waiting, WaitingQueues):
+            return waiting.nearest_occupied(elevator_floor)
+
+        min_distance = 2147483647
+        target_floor = None
+
+        for floor in waiting:
+            if len(waiting[floor]) == 0:
+                continue
+
+            difference = floor - elevator_floor
+
+            if abs(difference) < abs(min_distance):
+                min_distance = difference
+                target_floor = floor
+
+            # to break the tie, we will choose the floor which has
+            # a negative difference(below elevator.floor)
+            elif abs(difference) == abs(
+                    min_distance) and difference < min_distance:
+                min_distance = difference
+                target_floor = floor
+
+        return target_floor
+
+    @staticmethod
+    def call_bitsets(waiting: Dict[int, List[Person]]) -> Tuple[int, int]:
+        """
+        return the up call and down call bitsets of waiting: bit i of the
+        first is set if anybody on floor i wants to go up, and of the second
+        if anybody there wants to go down
+        uses the call bitsets kept by waiting when it is a WaitingQueues
+        """
+        if isinstance(waiting, WaitingQueues):
+            return waiting.up_calls(), waiting.down_calls()
+
+        up_calls = 0
+        down_calls = 0
+        for floor in waiting:
+            for person in waiting[floor]:
+                if person.target > floor:
+                    up_calls |= 1 << floor
+                else:
+                    down_calls |= 1 << floor
+        return up_calls, down_calls
+
     def move_elevators(self,
                        elevators: List[Elevator],
                        waiting: Dict[int, List[Person]],
@@ -237,6 +894,81 @@ class MovingAlgorithm:
         raise NotImplementedError
 
 
+class DecisionCache:
+    """A bounded cache of the target floors a moving algorithm chose, keyed on
+    signatures of the states it chose them in.
+
+    When the cache is full, adding an entry drops the least recently used
+    one. The hit and miss counts show whether the cache pays off: states
+    only repeat when traffic is steady enough, and each lookup costs about
+    as much as the index lookups it replaces.
+
+    === Attributes ===
+    max_size: the most entries this cache holds
+    hits: the number of lookups that found their signature
+    misses: the number of lookups that did not
+
+    === Private Attributes ===
+    _entries: maps each signature to its target floor, from the least to
+              the most recently used
+
+    === Representation invariants ===
+     - len(_entries) <= max_size
+    """
+    max_size: int
+    hits: int
+    misses: int
+    _entries: 'OrderedDict[Hashable, Optional[int]]'
+
+    def __init__(self, max_size: int) -> None:
+        """Initialize an empty cache holding up to <max_size> entries.
+
+        Precondition: max_size >= 1
+        """
+        self.max_size = max_size
+        self.hits = 0
+        self.misses = 0
+        self._entries = OrderedDict()
+
+    def lookup(self, signature: Hashable,
+               choose: Callable[[], Optional[int]]) -> Optional[int]:
+        """Return the target floor cached for <signature>, or on a miss, call
+        <choose> to pick it and cache what it returns.
+        """
+        entries = self._entries
+        if signature in entries:
+            self.hits += 1
+            entries.move_to_end(signature)
+            return entries[signature]
+
+        self.misses += 1
+        target = choose()
+        entries[signature] = target
+        if len(entries) > self.max_size:
+            entries.popitem(last=False)
+        return target
+
+    def clear(self) -> None:
+        """Forget every entry, and reset the hit and miss counts.
+        """
+        self._entries.clear()
+        self.hits = 0
+        self.misses = 0
+
+    def summary(self) -> Dict[str, Any]:
+        """Return the hit and miss counts, the hit rate, and the number of
+        entries, as a JSON-compatible dict.
+        """
+        lookups = self.hits + self.misses
+        return {
+            'hits': self.hits,
+            'misses': self.misses,
+            'hit_rate': self.hits / lookups if lookups > 0 else 0.0,
+            'size': len(self._entries),
+            'max_size': self.max_size
+        }
+
+
 class RandomAlgorithm(MovingAlgorithm):
     """A moving algorithm that picks a random direction for each elevator.
     """
@@ -272,14 +1004,26 @@ class PushyPassenger(MovingAlgorithm):
     If the elevator isn't empty, it moves towards the target floor of the
     *first* passenger who boarded the elevator.
     """
+    moves_towards_target = True
+
+    def target_floor(self, elevator: Elevator,
+                     waiting: Dict[int, List[Person]],
+                     max_floor: int) -> Optional[int]:
+        """
+        if elevator is empty, return the lowest floor having someone waiting,
+        or None if no one is waiting
+        if not empty, return the first passenger's target
+        """
+        if elevator.fullness() == 0.0:
+            return MovingAlgorithm.lowest_waiting_floor(waiting)
+        return elevator.first_passenger().target
 
     def move_elevators(self, elevators: List[Elevator],
                        waiting: Dict[int, List[Person]], max_floor: int) -> \
             List[Direction]:
         """
         for each elevator:
-        if it's empty, loop through(low to high) waiting to find
-        the first lowest floor having someone waiting,
+        if it's empty, find the lowest floor having someone waiting,
         and move towards that floor by 1
         if no one waiting, moves default direction which is 0, means stay
         if not empty, just move towards first passenger's target by 1
@@ -287,16 +1031,9 @@ class PushyPassenger(MovingAlgorithm):
         """
         directions = []
         for elevator in elevators:
-            direction = 0
-            if elevator.fullness() == 0.0:
-                for floor in waiting:
-                    if len(waiting[floor]) > 0:
-                        direction = MovingAlgorithm.get_motion_direction(
-                            elevator.floor, floor)
-                        break
-            else:
-                direction = MovingAlgorithm.get_motion_direction(
-                    elevator.floor, elevator.passengers[0].target)
+            direction = MovingAlgorithm.get_motion_direction(
+                elevator.floor,
+                self.target_floor(elevator, waiting, max_floor))
 
             elevator.move(direction)
             directions.append(Direction(direction))
@@ -314,7 +1051,55 @@ class ShortSighted(MovingAlgorithm):
     all passengers who are on the elevator.
 
     In this case, the order in which people boarded does *not* matter.
+
+    === Attributes ===
+    cache: the cache of decisions, or None if decisions are not cached
     """
+    moves_towards_target = True
+    cache: Optional[DecisionCache]
+
+    def __init__(self, cache_size: int = 0) -> None:
+        """
+        initialize the algorithm, caching up to cache_size decisions,
+        or none if cache_size is 0
+        """
+        self.cache = DecisionCache(cache_size) if cache_size > 0 else None
+
+    def target_floor(self, elevator: Elevator,
+                     waiting: Dict[int, List[Person]],
+                     max_floor: int) -> Optional[int]:
+        """
+        if elevator is empty, return the closest floor that has someone
+        waiting, or None if no one is waiting
+        if not empty, return the closest target floor of all passengers who
+        are on the elevator
+        ties are broken towards the lower floor
+        this never uses the cache, so that predictions made by the
+        simulation do not count as cache lookups
+        """
+        if elevator.fullness() == 0.0:
+            return MovingAlgorithm.nearest_waiting_floor(waiting,
+                                                         elevator.floor)
+        return elevator.nearest_target()
+
+    def _decide(self, elevator: Elevator, waiting: Dict[int, List[Person]],
+                max_floor: int) -> Optional[int]:
+        """
+        return target_floor(elevator, waiting, max_floor), looked up in the
+        cache if there is one
+        a decision is keyed on the elevator's floor and either the occupied
+        floors, if it is empty, or its passengers' targets
+        """
+        if self.cache is None or not isinstance(waiting, WaitingQueues):
+            return self.target_floor(elevator, waiting, max_floor)
+
+        if elevator.fullness() == 0.0:
+            signature = (elevator.floor, waiting.occupied_floors())
+        else:
+            signature = (elevator.floor, elevator.target_floors())
+        return self.cache.lookup(
+            signature,
+            lambda: self.target_floor(elevator, waiting, max_floor))
 
     def move_elevators(self, elevators: List[Elevator],
                        waiting: Dict[int, List[Person]], max_floor: int) -> \
@@ -323,74 +1108,399 @@ class ShortSighted(MovingAlgorithm):
         """
         for each elevator:
         if it's empty, move towards the closest floor that has someone waiting,
-        by looping through waiting to find the floor with minimum difference and
-        having waiting person
+        breaking ties towards the lower floor
         if not empty, moves towards the closest target floor of
         all passengers who are on the elevator
-        by calculating each passenger's target's distance to current floor and
-        select the closest to go
+        (looked up in the elevator's target floor index, breaking ties
+        towards the lower floor)
+        with a cache, each decision is looked up in it first
         return the records of movement
         """
         directions = []
         for elevator in elevators:
-            if elevator.fullness() == 0.0:
-                min_distance = 2147483647
-                target_floor = None
-
-                for floor in waiting:
-                    if len(waiting[floor]) == 0:
-                        continue
-
-                    difference = floor - elevator.floor
-
-                    if abs(difference) < abs(
-                            min_distance):
-                        min_distance = difference
-                        target_floor = floor
-
-                    # to break the tie, we will choose the floor which has
-                    # a negative difference(below elevator.floor)
-                    elif abs(difference) == abs(
-                            min_distance) and difference < min_distance:
-                        min_distance = difference
-                        target_floor = floor
-
-                direction = MovingAlgorithm.get_motion_direction(
-                    elevator.floor, target_floor)
+            direction = MovingAlgorithm.get_motion_direction(
+                elevator.floor, self._decide(elevator, waiting, max_floor))
+
+            elevator.move(direction)
+            directions.append(Direction(direction))
+
+        return directions
+
+
+class Look(MovingAlgorithm):
+    """A moving algorithm that sweeps each elevator up and down the building.
+
+    Each elevator keeps a travel direction. It carries on in that direction
+    as long as there is anything ahead of it: a target floor of one of its
+    passengers or, if it has room, a floor where somebody is waiting to go
+    its way, or failing that, the other way (so it goes as far as the
+    furthest call, and turns there). Only when nothing is ahead does it turn
+    around, if there is anything behind it, or otherwise stop. A stopped
+    elevator heads for the closest target floor of its passengers or, if it
+    is empty, the closest floor with somebody waiting, breaking ties towards
+    the lower floor.
+
+    Unlike ShortSighted, an elevator never turns back for a closer floor
+    until it has served everything ahead of it, so far calls are not
+    starved and it does not thrash between floors under heavy load.
+
+    Each decision only looks at the elevator's target floors next to its
+    floor and at the up call and down call bitsets of the waiting queues,
+    so it takes constant time per elevator, apart from the big-integer bit
+    operations on the bitsets.
+
+    === Private Attributes ===
+    _directions: the travel direction of each elevator, by its position in
+                 the list of elevators: 1 for up, -1 for down, and 0 for
+                 stopped
+    """
+    _directions: List[int]
+
+    def __init__(self) -> None:
+        """
+        initialize a Look algorithm with no elevators moving yet
+        """
+        self._directions = []
+
+    def get_state(self) -> Any:
+        """
+        return the travel directions of the elevators
+        """
+        return list(self._directions)
+
+    def set_state(self, state: Any) -> None:
+        """
+        restore the travel directions returned by get_state
+        """
+        self._directions = list(state)
+
+    @staticmethod
+    def _has_call(calls: int, floor: int, direction: int) -> bool:
+        """
+        return whether the bitset calls has a floor past floor in direction
+        """
+        if direction > 0:
+            return calls >> (floor + 1) != 0
+        return calls & ((1 << floor) - 1) != 0
+
+    def _next_direction(self, elevator: Elevator,
+                        waiting: Dict[int, List[Person]],
+                        direction: int) -> int:
+        """
+        return the direction elevator should travel in next, given that it
+        was travelling in direction
+        it keeps going for a target ahead, or a call ahead going its way and
+        then one going the other way; with nothing ahead, it turns for a
+        target or any call behind, and otherwise stops
+        calls are ignored when elevator is full
+        """
+        if direction != 0:
+            floor = elevator.floor
+            if elevator.fullness() >= 1.0:
+                up_calls, down_calls = 0, 0
             else:
-                min_distance = 2147483647
-                target_floor = None
+                up_calls, down_calls = MovingAlgorithm.call_bitsets(waiting)
+            if direction > 0:
+                same, opposite = up_calls, down_calls
+            else:
+                same, opposite = down_calls, up_calls
+
+            if elevator.next_target(floor, direction) is not None or \
+                    Look._has_call(same, floor, direction) or \
+                    Look._has_call(opposite, floor, direction):
+                return direction
+            if elevator.next_target(floor, -direction) is not None or \
+                    Look._has_call(opposite, floor, -direction) or \
+                    Look._has_call(same, floor, -direction):
+                return -direction
+            return 0
+
+        if elevator.fullness() > 0.0:
+            target = elevator.nearest_target()
+        else:
+            target = MovingAlgorithm.nearest_waiting_floor(waiting,
+                                                           elevator.floor)
+        if target is None or target == elevator.floor:
+            return 0
+        return MovingAlgorithm.get_motion_direction(elevator.floor, target)
 
-                for passenger in elevator.passengers:
-                    difference = passenger.target - elevator.floor
+    def move_elevators(self, elevators: List[Elevator],
+                       waiting: Dict[int, List[Person]], max_floor: int) -> \
+            List[Direction]:
+        """
+        for each elevator:
+        keep moving in its travel direction while there is a passenger
+        target, or somebody waiting that it has room for (going its way
+        first, then the other way), ahead of it
+        otherwise, turn around if there is something behind it, or stop
+        a stopped elevator heads for the closest target floor, or if empty,
+        the closest floor with somebody waiting
+        return the records of movement
+        """
+        while len(self._directions) < len(elevators):
+            self._directions.append(0)
+
+        directions = []
+        for i, elevator in enumerate(elevators):
+            direction = self._next_direction(elevator, waiting,
+                                             self._directions[i])
+            if not 1 <= elevator.floor + direction <= max_floor:
+                direction = 0
+            self._directions[i] = direction
+
+            elevator.move(direction)
+            directions.append(Direction(direction))
+
+        return directions
+
+
+class Dispatcher(MovingAlgorithm):
+    """A moving algorithm that assigns every call to one elevator.
+
+    A call is a floor together with a direction that somebody waiting there
+    wants to travel in. Each round, every new call is assigned to the
+    elevator with the lowest estimated time to reach it, so that several
+    elevators don't chase the same floor. A call stays assigned until it is
+    answered or the elevator assigned to it reaches its floor; if people are
+    still waiting there after that (because the elevator filled up), the call
+    is assigned again as a new one.
+
+    An elevator's stops are its passengers' target floors and the floors of
+    its assigned calls. It sweeps through its stops like in Look: it keeps
+    going in its travel direction while it has a stop ahead, then turns
+    around if it has one behind, and otherwise stops.
+
+    The estimated time for an elevator to reach a call is the distance to it
+    if the elevator is stopped, or if the call is ahead of it and either
+    wants to go its way or is beyond all of its stops. Otherwise, the
+    elevator must first finish its sweep, so it is the distance to the end
+    of the sweep and back to the call. Full elevators are penalized by
+    2 * max_floor, so that they only get calls when every elevator is full.
+
+    The calls are found from the up call and down call bitsets of the
+    waiting queues, and only calls that are not assigned yet are looked at,
+    so a round costs time in proportion to the number of new calls times the
+    number of elevators, plus the number of assigned calls.
+
+    === Private Attributes ===
+    _directions: the travel direction of each elevator, by its position in
+                 the list of elevators: 1 for up, -1 for down, and 0 for
+                 stopped
+    _assigned: maps each assigned call, as a (floor, direction) pair, to the
+               position of its elevator in the list of elevators
+    _assigned_up: a bitset of the floors of the assigned up calls
+    _assigned_down: a bitset of the floors of the assigned down calls
+
+    === Representation invariants ===
+     - bit i of _assigned_up is set iff (i, 1) is in _assigned
+     - bit i of _assigned_down is set iff (i, -1) is in _assigned
+    """
+    _directions: List[int]
+    _assigned: Dict[Tuple[int, int], int]
+    _assigned_up: int
+    _assigned_down: int
+
+    def __init__(self) -> None:
+        """
+        initialize a Dispatcher with no calls assigned yet
+        """
+        self._directions = []
+        self._assigned = {}
+        self._assigned_up = 0
+        self._assigned_down = 0
+
+    def get_state(self) -> Any:
+        """
+        return the travel directions of the elevators and the assigned calls
+        """
+        return list(self._directions), dict(self._assigned)
 
-                    if abs(difference) < abs(min_distance):
-                        min_distance = difference
-                        target_floor = passenger.target
+    def set_state(self, state: Any) -> None:
+        """
+        restore the directions and assigned calls returned by get_state
+        """
+        self._directions = list(state[0])
+        self._assigned = dict(state[1])
+        self._assigned_up = 0
+        self._assigned_down = 0
+        for floor, direction in self._assigned:
+            if direction > 0:
+                self._assigned_up |= 1 << floor
+            else:
+                self._assigned_down |= 1 << floor
 
-                    # to break the tie, we will choose the floor which has
-                    # a negative difference(below elevator.floor)
-                    elif abs(difference) == abs(
-                            min_distance) and difference < min_distance:
-                        min_distance = difference
-                        target_floor = passenger.target
+    def move_elevators(self, elevators: List[Elevator],
+                       waiting: Dict[int, List[Person]], max_floor: int) -> \
+            List[Direction]:
+        """
+        drop the calls that have been answered, or whose elevator reached
+        their floor
+        assign each new call to the elevator that can reach it soonest
+        then move each elevator towards its next stop, keeping its
+        travel direction while it has a stop ahead
+        return the records of movement
+        """
+        while len(self._directions) < len(elevators):
+            self._directions.append(0)
+
+        up_calls, down_calls = MovingAlgorithm.call_bitsets(waiting)
+        self._drop_calls(elevators, up_calls, down_calls)
+
+        stops = [0] * len(elevators)
+        for (floor, _), i in self._assigned.items():
+            stops[i] |= 1 << floor
+
+        for direction, new_calls in \
+                ((1, up_calls & ~self._assigned_up),
+                 (-1, down_calls & ~self._assigned_down)):
+            while new_calls != 0:
+                lowest = new_calls & -new_calls
+                new_calls ^= lowest
+                floor = lowest.bit_length() - 1
+
+                best = 0
+                best_time = None
+                for j, elevator in enumerate(elevators):
+                    time = self._estimate(elevator, self._directions[j],
+                                          stops[j], floor, direction,
+                                          max_floor)
+                    if best_time is None or time < best_time:
+                        best, best_time = j, time
+                self._assign(floor, direction, best)
+                stops[best] |= lowest
 
-                direction = MovingAlgorithm.get_motion_direction(
-                    elevator.floor, target_floor)
+        directions = []
+        for i, elevator in enumerate(elevators):
+            direction = Dispatcher._next_direction(
+                elevator, self._directions[i], stops[i], max_floor)
+            if not 1 <= elevator.floor + direction <= max_floor:
+                direction = 0
+            self._directions[i] = direction
 
             elevator.move(direction)
             directions.append(Direction(direction))
 
         return directions
 
+    def _assign(self, floor: int, direction: int, index: int) -> None:
+        """
+        assign the call at floor in direction to the elevator at index
+        """
+        self._assigned[(floor, direction)] = index
+        if direction > 0:
+            self._assigned_up |= 1 << floor
+        else:
+            self._assigned_down |= 1 << floor
+
+    def _drop_calls(self, elevators: List[Elevator], up_calls: int,
+                    down_calls: int) -> None:
+        """
+        unassign every call that is no longer in up_calls or down_calls, or
+        whose elevator is at its floor
+        """
+        dropped = []
+        for (floor, direction), i in self._assigned.items():
+            calls = up_calls if direction > 0 else down_calls
+            if (calls >> floor) & 1 == 0 or i >= len(elevators) or \
+                    elevators[i].floor == floor:
+                dropped.append((floor, direction))
+
+        for floor, direction in dropped:
+            del self._assigned[(floor, direction)]
+            if direction > 0:
+                self._assigned_up &= ~(1 << floor)
+            else:
+                self._assigned_down &= ~(1 << floor)
+
+    @staticmethod
+    def _sweep_end(elevator: Elevator, direction: int, stops: int) -> int:
+        """
+        return the farthest of elevator's stops in direction from its floor,
+        or its floor if it has no stop that way
+        """
+        floor = elevator.floor
+        if direction > 0:
+            target = elevator.highest_target()
+            if target is not None and target > floor:
+                floor = target
+            if stops >> (floor + 1) != 0:
+                floor = stops.bit_length() - 1
+        else:
+            target = elevator.lowest_target()
+            if target is not None and target < floor:
+                floor = target
+            below = stops & ((1 << floor) - 1)
+            if below != 0:
+                floor = (below & -below).bit_length() - 1
+        return floor
+
+    @staticmethod
+    def _estimate(elevator: Elevator, travel: int, stops: int, floor: int,
+                  direction: int, max_floor: int) -> int:
+        """
+        return the estimated number of rounds elevator, travelling in travel
+        with the given stops, takes to reach the call at floor in direction
+        """
+        if travel == 0:
+            rounds = abs(floor - elevator.floor)
+        else:
+            end = Dispatcher._sweep_end(elevator, travel, stops)
+            ahead = (floor - elevator.floor) * travel >= 0
+            if ahead and (direction == travel or (end - floor) * travel <= 0):
+                rounds = abs(floor - elevator.floor)
+            else:
+                rounds = abs(end - elevator.floor) + abs(end - floor)
+
+        if elevator.fullness() >= 1.0:
+            rounds += 2 * max_floor
+        return rounds
+
+    @staticmethod
+    def _next_direction(elevator: Elevator, direction: int, stops: int,
+                        max_floor: int) -> int:
+        """
+        return the direction elevator should travel in next, given that it
+        was travelling in direction and has the given stops besides its
+        passengers' target floors
+        """
+        floor = elevator.floor
+        highest = elevator.highest_target()
+        lowest = elevator.lowest_target()
+        has_above = (highest is not None and highest > floor) or \
+            stops >> (floor + 1) != 0
+        has_below = (lowest is not None and lowest < floor) or \
+            stops & ((1 << floor) - 1) != 0
+
+        if direction > 0 and has_above or direction < 0 and has_below:
+            return direction
+        if has_above and has_below:
+            # a stopped elevator heads for its closest stop, breaking ties
+            # towards the lower floor
+            above = stops >> (floor + 1)
+            below = stops & ((1 << floor) - 1)
+            up = (above & -above).bit_length() if above != 0 else max_floor
+            down = floor - below.bit_length() + 1 if below != 0 else max_floor
+            target = elevator.nearest_target()
+            if target is not None and target > floor:
+                up = min(up, target - floor)
+            elif target is not None and target < floor:
+                down = min(down, floor - target)
+            return 1 if up < down else -1
+        if has_above:
+            return 1
+        if has_below:
+            return -1
+        return 0
+
 
 if __name__ == '__main__':
     # Don't forget to check your work regularly with python_ta!
     import python_ta
 
     python_ta.check_all(config={
-        'allowed-io': ['__init__'],
-        'extra-imports': ['entities', 'random', 'csv', 'enum'],
+        'allowed-io': ['__init__', '_rewind'],
+        'extra-imports': ['entities', 'random', 'csv', 'enum', 'numpy',
+                          'bisect', 'math', 'collections'],
         'max-nested-blocks': 4,
         'disable': ['R0201']
     })
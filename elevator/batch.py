@@ -0,0 +1,378 @@
+"""CSC148 Assignment 1 - Batched multi-building simulation
+
+=== CSC148 Fall 2018 ===
+Department of Computer Science,
+University of Toronto
+
+=== Module description ===
+This module contains BatchSimulation, which simulates many independent
+buildings of the same shape with the same moving algorithm at once. Instead
+of a graph of Person and Elevator objects per building, it keeps the state
+of every building in NumPy arrays with one row per building, and each stage
+of a round updates every building with a handful of array operations.
+
+Only the ShortSighted and PushyPassenger algorithms are supported, since
+their rules only depend on the state arrays. Each building gets its own
+arrival generator, and the statistics returned for each building are the
+same as those Simulation.run returns for a simulation with that generator.
+
+Arrivals are still drawn building by building, through each generator's
+draw method, so a generator that uses the random module (like
+RandomArrivals) draws different people here than in a separate Simulation,
+which would make all of its draws before the next building's. Seeded
+generators such as BatchRandomArrivals, or FileArrivals, give identical
+results.
+
+This module requires NumPy.
+"""
+from typing import Any, Dict, List
+
+import numpy
+
+from algorithms import ArrivalGenerator, PushyPassenger, ShortSighted
+
+# Larger than any key compared in _move_elevators.
+_NO_KEY = numpy.iinfo(numpy.int64).max
+
+# The optional Simulation config keys that BatchSimulation does not support,
+# with the value each has when it is off.
+_UNSUPPORTED_KEYS = {
+    'elevator_speed': 1,
+    'elevator_acceleration': None,
+    'boarding_time': 0,
+    'door_time': 0,
+    'compact_population': False,
+    'wait_percentiles': False,
+    'profile': False,
+    'telemetry': None,
+    'visualizer': None,
+}
+
+
+class BatchSimulation:
+    """A simulation of many buildings at once.
+
+    === Attributes ===
+    arrival_generators: the arrival generator of each building
+    moving_algorithm: the algorithm moving the elevators of every building
+    num_buildings: the number of buildings
+    num_floors: the number of floors of each building
+    num_elevators: the number of elevators of each building
+    elevator_capacity: the capacity of every elevator
+    elevator_floors: the floor of each elevator, with shape
+                     (num_buildings, num_elevators)
+    elevator_loads: the number of passengers on each elevator, with shape
+                    (num_buildings, num_elevators)
+    queue_counts: the number of people waiting on each floor, with shape
+                  (num_buildings, num_floors + 1) (column 0 is unused)
+
+    === Private Attributes ===
+    _passenger_targets: the target floor of each passenger, with shape
+                        (num_buildings, num_elevators, elevator_capacity);
+                        the passengers of an elevator are in its first
+                        elevator_loads slots, in boarding order
+    _passenger_arrivals: the arrival round of each passenger, laid out like
+                         _passenger_targets
+    _queue_heads: the position of the first person in each floor's queue,
+                  laid out like queue_counts
+    _queue_targets: the target floor of each person waiting, in a ring
+                    buffer per floor, with shape
+                    (num_buildings, num_floors + 1, queue length)
+    _queue_arrivals: the arrival round of each person waiting, laid out
+                     like _queue_targets
+    _num_rounds: the number of rounds run so far
+    _arrived: the number of people who have arrived in each building
+    _completed: the number of people who have completed their trip in each
+                building
+    _wait_total: the sum of the wait times of those people, per building
+    _wait_max: the longest of their wait times, per building (-1 if none)
+    _wait_min: the shortest of their wait times, per building (_NO_KEY if
+               none)
+
+    === Representation invariants ===
+     - 0 <= elevator_loads <= elevator_capacity
+     - queue_counts <= the queue length
+    """
+    arrival_generators: List[ArrivalGenerator]
+    moving_algorithm: Any
+    num_buildings: int
+    num_floors: int
+    num_elevators: int
+    elevator_capacity: int
+    elevator_floors: numpy.ndarray
+    elevator_loads: numpy.ndarray
+    queue_counts: numpy.ndarray
+    _passenger_targets: numpy.ndarray
+    _passenger_arrivals: numpy.ndarray
+    _queue_heads: numpy.ndarray
+    _queue_targets: numpy.ndarray
+    _queue_arrivals: numpy.ndarray
+    _num_rounds: int
+    _arrived: numpy.ndarray
+    _completed: numpy.ndarray
+    _wait_total: numpy.ndarray
+    _wait_max: numpy.ndarray
+    _wait_min: numpy.ndarray
+
+    def __init__(self, config: Dict[str, Any]) -> None:
+        """Initialize a new batched simulation using the given configuration.
+
+        The configuration has the same keys as a Simulation's, except that
+        'arrival_generators' lists one arrival generator per building in
+        place of 'arrival_generator', and 'visualize' is ignored.
+
+        Raise ValueError if the moving algorithm is not a ShortSighted or a
+        PushyPassenger, or if the configuration turns on an option that
+        BatchSimulation does not model (elevator speeds, dwell times, compact
+        storage, wait percentiles, profiling, telemetry or a visualizer),
+        since its statistics would no longer match Simulation's.
+        """
+        if not isinstance(config['moving_algorithm'],
+                          (ShortSighted, PushyPassenger)):
+            raise ValueError('BatchSimulation only supports the ShortSighted '
+                             'and PushyPassenger algorithms')
+        for key, off in _UNSUPPORTED_KEYS.items():
+            if config.get(key, off) != off:
+                raise ValueError('BatchSimulation does not support the '
+                                 + repr(key) + ' option')
+        self.arrival_generators = list(config['arrival_generators'])
+        self.moving_algorithm = config['moving_algorithm']
+        self.num_buildings = len(self.arrival_generators)
+        self.num_floors = config['num_floors']
+        self.num_elevators = config['num_elevators']
+        self.elevator_capacity = config['elevator_capacity']
+
+        buildings = self.num_buildings
+        shape = (buildings, self.num_elevators)
+        self.elevator_floors = numpy.ones(shape, dtype=numpy.int64)
+        self.elevator_loads = numpy.zeros(shape, dtype=numpy.int64)
+        shape = (buildings, self.num_elevators, self.elevator_capacity)
+        self._passenger_targets = numpy.zeros(shape, dtype=numpy.int64)
+        self._passenger_arrivals = numpy.zeros(shape, dtype=numpy.int64)
+
+        shape = (buildings, self.num_floors + 1)
+        self.queue_counts = numpy.zeros(shape, dtype=numpy.int64)
+        self._queue_heads = numpy.zeros(shape, dtype=numpy.int64)
+        shape = (buildings, self.num_floors + 1, 16)
+        self._queue_targets = numpy.zeros(shape, dtype=numpy.int64)
+        self._queue_arrivals = numpy.zeros(shape, dtype=numpy.int64)
+
+        self._num_rounds = 0
+        self._arrived = numpy.zeros(buildings, dtype=numpy.int64)
+        self._completed = numpy.zeros(buildings, dtype=numpy.int64)
+        self._wait_total = numpy.zeros(buildings, dtype=numpy.int64)
+        self._wait_max = numpy.full(buildings, -1, dtype=numpy.int64)
+        self._wait_min = numpy.full(buildings, _NO_KEY, dtype=numpy.int64)
+
+    def run(self, num_rounds: int) -> List[Dict[str, int]]:
+        """Run every building for the given number of rounds.
+
+        Return the statistics of each building, in the order of the arrival
+        generators, as Simulation.run would.
+
+        Precondition: num_rounds >= 1.
+        """
+        for round_num in range(num_rounds):
+            self._generate_arrivals(round_num)
+            self._handle_leaving(round_num)
+            self._handle_boarding()
+            self._move_elevators()
+            self._num_rounds += 1
+
+        return self._calculate_stats()
+
+    def _generate_arrivals(self, round_num: int) -> None:
+        """Add the people arriving in round <round_num> in every building to
+        the back of the queues of their start floors, in the order their
+        generators drew them.
+        """
+        buildings = []
+        starts = []
+        targets = []
+        for building, generator in enumerate(self.arrival_generators):
+            drawn_starts, drawn_targets = generator.draw(round_num)
+            buildings.extend([building] * len(drawn_starts))
+            starts.extend(drawn_starts)
+            targets.extend(drawn_targets)
+        if len(starts) == 0:
+            return
+
+        buildings = numpy.array(buildings, dtype=numpy.int64)
+        starts = numpy.array(starts, dtype=numpy.int64)
+        targets = numpy.array(targets, dtype=numpy.int64)
+        self._arrived += numpy.bincount(buildings,
+                                        minlength=self.num_buildings)
+
+        # The rank of each person among those arriving in the same queue,
+        # in the order they were drawn.
+        queues = buildings * (self.num_floors + 1) + starts
+        order = numpy.argsort(queues, kind='stable')
+        sorted_queues = queues[order]
+        firsts = numpy.flatnonzero(numpy.concatenate(
+            ([True], sorted_queues[1:] != sorted_queues[:-1])))
+        sizes = numpy.diff(numpy.append(firsts, len(queues)))
+        ranks = numpy.empty_like(order)
+        ranks[order] = numpy.arange(len(queues)) - numpy.repeat(firsts, sizes)
+
+        added = numpy.bincount(queues, minlength=self.queue_counts.size) \
+            .reshape(self.queue_counts.shape)
+        self._reserve(int((self.queue_counts + added).max()))
+
+        length = self._queue_targets.shape[2]
+        positions = (self._queue_heads[buildings, starts] +
+                     self.queue_counts[buildings, starts] + ranks) % length
+        self._queue_targets[buildings, starts, positions] = targets
+        self._queue_arrivals[buildings, starts, positions] = round_num
+        self.queue_counts += added
+
+    def _reserve(self, length: int) -> None:
+        """Make the queue ring buffers at least <length> long.
+        """
+        old_length = self._queue_targets.shape[2]
+        if length <= old_length:
+            return
+
+        new_length = max(length, 2 * old_length)
+        unrolled = (self._queue_heads[:, :, None] +
+                    numpy.arange(old_length)) % old_length
+        shape = self._queue_targets.shape[:2] + (new_length,)
+        for name in ('_queue_targets', '_queue_arrivals'):
+            grown = numpy.zeros(shape, dtype=numpy.int64)
+            grown[:, :, :old_length] = numpy.take_along_axis(
+                getattr(self, name), unrolled, axis=2)
+            setattr(self, name, grown)
+        self._queue_heads[:] = 0
+
+    def _handle_leaving(self, round_num: int) -> None:
+        """Take the passengers who reached their target floor off every
+        elevator, and record their wait times.
+        """
+        slots = numpy.arange(self.elevator_capacity)
+        on_board = slots < self.elevator_loads[:, :, None]
+        leaving = on_board & \
+            (self._passenger_targets == self.elevator_floors[:, :, None])
+        if not leaving.any():
+            return
+
+        waits = round_num - self._passenger_arrivals
+        num_leaving = leaving.sum(axis=2)
+        self._completed += num_leaving.sum(axis=1)
+        self._wait_total += numpy.where(leaving, waits, 0).sum(axis=(1, 2))
+        self._wait_max = numpy.maximum(
+            self._wait_max, numpy.where(leaving, waits, -1).max(axis=(1, 2)))
+        self._wait_min = numpy.minimum(
+            self._wait_min,
+            numpy.where(leaving, waits, _NO_KEY).min(axis=(1, 2)))
+
+        # Move the passengers who stay to the front, keeping their order.
+        order = numpy.argsort(~(on_board & ~leaving), axis=2, kind='stable')
+        self._passenger_targets = numpy.take_along_axis(
+            self._passenger_targets, order, axis=2)
+        self._passenger_arrivals = numpy.take_along_axis(
+            self._passenger_arrivals, order, axis=2)
+        self.elevator_loads -= num_leaving
+
+    def _handle_boarding(self) -> None:
+        """Board as many people as there is room for from the front of the
+        queue on each elevator's floor, one elevator at a time as in
+        Simulation, but in every building at once.
+        """
+        buildings = numpy.arange(self.num_buildings)
+        length = self._queue_targets.shape[2]
+        for elevator in range(self.num_elevators):
+            floors = self.elevator_floors[:, elevator]
+            loads = self.elevator_loads[:, elevator]
+            heads = self._queue_heads[buildings, floors]
+            boarding = numpy.minimum(self.elevator_capacity - loads,
+                                     self.queue_counts[buildings, floors])
+
+            for k in range(int(boarding.max())):
+                rows = numpy.flatnonzero(boarding > k)
+                positions = (heads[rows] + k) % length
+                slots = loads[rows] + k
+                self._passenger_targets[rows, elevator, slots] = \
+                    self._queue_targets[rows, floors[rows], positions]
+                self._passenger_arrivals[rows, elevator, slots] = \
+                    self._queue_arrivals[rows, floors[rows], positions]
+
+            self._queue_heads[buildings, floors] = (heads + boarding) % length
+            self.queue_counts[buildings, floors] -= boarding
+            self.elevator_loads[:, elevator] += boarding
+
+    def _move_elevators(self) -> None:
+        """Move every elevator one floor towards the target chosen by the
+        moving algorithm's rule, or keep it still if it has none.
+        """
+        floors = self.elevator_floors
+        occupied = self.queue_counts[:, 1:] > 0
+        slots = numpy.arange(self.elevator_capacity)
+        on_board = slots < self.elevator_loads[:, :, None]
+
+        if isinstance(self.moving_algorithm, ShortSighted):
+            # The closest occupied floor, or the closest passenger target,
+            # breaking ties towards the lower floor.
+            floor_numbers = numpy.arange(1, self.num_floors + 1)
+            keys = numpy.where(
+                occupied[:, None, :],
+                2 * numpy.abs(floor_numbers - floors[:, :, None]) +
+                (floor_numbers > floors[:, :, None]), _NO_KEY)
+            waiting_targets = keys.argmin(axis=2) + 1
+            has_waiting = keys.min(axis=2) != _NO_KEY
+
+            targets = self._passenger_targets
+            keys = numpy.where(
+                on_board,
+                2 * numpy.abs(targets - floors[:, :, None]) +
+                (targets > floors[:, :, None]), _NO_KEY)
+            passenger_targets = numpy.take_along_axis(
+                targets, keys.argmin(axis=2)[:, :, None], axis=2)[:, :, 0]
+        else:
+            # The lowest occupied floor, or the first passenger's target.
+            waiting_targets = numpy.broadcast_to(
+                occupied.argmax(axis=1)[:, None] + 1, floors.shape)
+            has_waiting = numpy.broadcast_to(occupied.any(axis=1)[:, None],
+                                             floors.shape)
+            passenger_targets = self._passenger_targets[:, :, 0]
+
+        loaded = self.elevator_loads > 0
+        targets = numpy.where(loaded, passenger_targets, waiting_targets)
+        # As in MovingAlgorithm.get_motion_direction.
+        directions = numpy.where(floors < targets, 1, -1)
+        self.elevator_floors += numpy.where(loaded | has_waiting,
+                                            directions, 0)
+
+    def _calculate_stats(self) -> List[Dict[str, int]]:
+        """Report the statistics of each building, as Simulation does.
+        """
+        stats = []
+        for building in range(self.num_buildings):
+            completed = int(self._completed[building])
+            building_stats = {
+                'num_iterations': self._num_rounds,
+                'total_people': int(self._arrived[building]),
+                'people_completed': completed
+            }
+            # if zero passenger completed, the wait time statistics are -1
+            # as instructed
+            if completed == 0:
+                building_stats.update(
+                    {'max_time': -1, 'min_time': -1, 'avg_time': -1})
+            else:
+                building_stats.update({
+                    'max_time': int(self._wait_max[building]),
+                    'min_time': int(self._wait_min[building]),
+                    'avg_time': int(self._wait_total[building]) // completed
+                })
+            stats.append(building_stats)
+        return stats
+
+
+if __name__ == '__main__':
+    import python_ta
+
+    python_ta.check_all(config={
+        'extra-imports': ['algorithms', 'numpy'],
+        'max-nested-blocks': 4,
+        'max-attributes': 20,
+        'disable': ['R0201']
+    })
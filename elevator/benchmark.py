@@ -0,0 +1,272 @@
+"""CSC148 Assignment 1 - Benchmarks
+
+=== CSC148 Fall 2018 ===
+Department of Computer Science,
+University of Toronto
+
+=== Module description ===
+This module benchmarks the moving algorithms on buildings of increasing size.
+Every case runs a headless simulation with RandomArrivals, after seeding the
+random module with a fixed seed, so that the same case always simulates the
+same people and returns the same wait time statistics.
+
+Each case is timed REPEATS times, keeping the fastest run, to measure its
+speed in rounds per second, and run once more under tracemalloc to measure
+its peak memory use, since tracing allocations slows the simulation down too
+much to time it at the same time. With the stages option, one more profiled
+run breaks the time per round down by simulation stage.
+
+The results can be saved as a JSON baseline, and later results compared
+against it. The comparison reports a regression when a case's rounds per
+second drop, or its peak memory grows, by more than a tolerance, or when its
+wait time statistics change at all. Peak memory must also grow by at least
+MEMORY_FLOOR_KB, since small cases use so little that a few allocations more
+exceed the tolerance. Speeds are only comparable on the same
+machine, so a baseline should be recorded where it will be compared.
+
+Run this module to benchmark every case and print a table of the results:
+
+    python benchmark.py [--rounds N] [--save FILE] [--baseline FILE]
+                        [--tolerance T] [--stages]
+"""
+import argparse
+import json
+import os
+import random
+import sys
+import time
+import tracemalloc
+from typing import Any, Dict, List, Optional, Tuple
+
+# Benchmarks never display anything, so keep pygame out of the measurements.
+os.environ.setdefault('ELEVATOR_HEADLESS', '1')
+
+# pylint: disable=wrong-import-position
+import algorithms
+from simulation import Simulation
+
+# The buildings benchmarked, as (num_floors, num_elevators, num_people)
+# triples, where num_people is the number of arrivals per round.
+SIZES = [
+    (5, 1, 2),
+    (20, 4, 5),
+    (50, 8, 10),
+    (100, 16, 20),
+]
+
+ALGORITHMS = {
+    'RandomAlgorithm': algorithms.RandomAlgorithm,
+    'PushyPassenger': algorithms.PushyPassenger,
+    'ShortSighted': algorithms.ShortSighted,
+    'Look': algorithms.Look,
+    'Dispatcher': algorithms.Dispatcher,
+}
+
+SEEDS = [148, 2018]
+
+NUM_ROUNDS = 500
+
+REPEATS = 5
+
+ELEVATOR_CAPACITY = 10
+
+# The smallest growth in peak memory, in KiB, that counts as a regression.
+MEMORY_FLOOR_KB = 64
+
+# The wait time statistics that must match the baseline exactly.
+WAIT_STATS = ['num_iterations', 'total_people', 'people_completed',
+              'max_time', 'min_time', 'avg_time']
+
+
+def cases(rounds: int = NUM_ROUNDS) -> List[Dict[str, Any]]:
+    """Return every benchmark case, running for <rounds> rounds.
+    """
+    return [{'algorithm': name, 'num_floors': floors,
+             'num_elevators': elevators, 'num_people': people,
+             'seed': seed, 'rounds': rounds}
+            for name in ALGORITHMS
+            for floors, elevators, people in SIZES
+            for seed in SEEDS]
+
+
+def run_case(case: Dict[str, Any], stages: bool = False) -> Dict[str, Any]:
+    """Run the benchmark <case>, and return it with its results added.
+
+    The results are the case's rounds per second, its peak traced memory in
+    kilobytes, and its wait time statistics. If <stages> is True, they also
+    include the seconds per round spent in each simulation stage.
+    """
+    seconds = float('inf')
+    for _ in range(REPEATS):
+        start = time.perf_counter()
+        stats = _simulate(case, profile=False)
+        seconds = min(seconds, time.perf_counter() - start)
+
+    tracemalloc.start()
+    try:
+        _simulate(case, profile=False)
+        peak = tracemalloc.get_traced_memory()[1]
+    finally:
+        tracemalloc.stop()
+
+    result = dict(case)
+    result['seconds'] = seconds
+    result['rounds_per_second'] = case['rounds'] / seconds
+    result['peak_memory_kb'] = peak / 1024
+    for name in WAIT_STATS:
+        result[name] = stats[name]
+    if stages:
+        profile = _simulate(case, profile=True)['profile']
+        result['stages'] = {stage: timing['seconds_per_round']
+                            for stage, timing in profile['stages'].items()}
+    return result
+
+
+def run_all(rounds: int = NUM_ROUNDS,
+            stages: bool = False) -> List[Dict[str, Any]]:
+    """Run every benchmark case for <rounds> rounds, and return their results.
+    """
+    all_cases = cases(rounds)
+    # Warm up the interpreter before timing, so the first case isn't slower.
+    _simulate(all_cases[0], profile=False)
+    return [run_case(case, stages) for case in all_cases]
+
+
+def compare(results: List[Dict[str, Any]], baseline: List[Dict[str, Any]],
+            tolerance: float = 0.2) -> List[str]:
+    """Return a description of every regression of <results> against
+    <baseline>.
+
+    A case regresses when its rounds per second fall below (1 - <tolerance>)
+    times the baseline's, when its peak memory rises above (1 + <tolerance>)
+    times the baseline's and by at least MEMORY_FLOOR_KB, or when any of its wait time statistics differ from
+    the baseline's. Cases missing from either list are not compared.
+    """
+    expected = {_key(result): result for result in baseline}
+    regressions = []
+    for result in results:
+        if _key(result) not in expected:
+            continue
+        old = expected[_key(result)]
+        name = _describe(result)
+        if result['rounds_per_second'] < \
+                old['rounds_per_second'] * (1 - tolerance):
+            regressions.append('{}: {:.0f} rounds/s, baseline {:.0f}'.format(
+                name, result['rounds_per_second'], old['rounds_per_second']))
+        if result['peak_memory_kb'] > old['peak_memory_kb'] * (1 + tolerance) \
+                and result['peak_memory_kb'] - old['peak_memory_kb'] >= \
+                MEMORY_FLOOR_KB:
+            regressions.append('{}: {:.0f} KiB peak, baseline {:.0f}'.format(
+                name, result['peak_memory_kb'], old['peak_memory_kb']))
+        for stat in WAIT_STATS:
+            if result[stat] != old[stat]:
+                regressions.append('{}: {} is {}, baseline {}'.format(
+                    name, stat, result[stat], old[stat]))
+    return regressions
+
+
+def save_results(results: List[Dict[str, Any]], filename: str) -> None:
+    """Save <results> to the JSON file <filename>, for use as a baseline.
+    """
+    with open(filename, 'w') as json_file:
+        json.dump(results, json_file, indent=2)
+
+
+def load_results(filename: str) -> List[Dict[str, Any]]:
+    """Return the results saved in the JSON file <filename>.
+    """
+    with open(filename) as json_file:
+        return json.load(json_file)
+
+
+def format_table(results: List[Dict[str, Any]]) -> str:
+    """Return <results> as a plain text table, one case per line.
+    """
+    lines = ['{:<16} {:>6} {:>9} {:>6} {:>5} {:>10} {:>10} {:>8}'.format(
+        'algorithm', 'floors', 'elevators', 'people', 'seed', 'rounds/s',
+        'peak KiB', 'avg wait')]
+    for result in results:
+        lines.append(
+            '{:<16} {:>6} {:>9} {:>6} {:>5} {:>10.0f} {:>10.0f} {:>8}'.format(
+                result['algorithm'], result['num_floors'],
+                result['num_elevators'], result['num_people'], result['seed'],
+                result['rounds_per_second'], result['peak_memory_kb'],
+                result['avg_time']))
+    return '\n'.join(lines)
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    """Run the benchmarks with the command line arguments <argv>, and return
+    the exit status: 1 if there were regressions against the baseline, and
+    0 otherwise.
+    """
+    parser = argparse.ArgumentParser(description='Benchmark the moving '
+                                                 'algorithms.')
+    parser.add_argument('--rounds', type=int, default=NUM_ROUNDS,
+                        help='the number of rounds each case runs for')
+    parser.add_argument('--save', metavar='FILE',
+                        help='save the results as a baseline')
+    parser.add_argument('--baseline', metavar='FILE',
+                        help='compare the results against a saved baseline')
+    parser.add_argument('--tolerance', type=float, default=0.2,
+                        help='the allowed relative change in speed and memory')
+    parser.add_argument('--stages', action='store_true',
+                        help='also time each stage of the simulation')
+    args = parser.parse_args(argv)
+
+    results = run_all(args.rounds, args.stages)
+    print(format_table(results))
+    if args.stages:
+        for result in results:
+            print(_describe(result) + ': ' + ', '.join(
+                '{} {:.1f}us'.format(stage, seconds * 1e6)
+                for stage, seconds in result['stages'].items()))
+    if args.save is not None:
+        save_results(results, args.save)
+
+    if args.baseline is not None:
+        regressions = compare(results, load_results(args.baseline),
+                              args.tolerance)
+        for regression in regressions:
+            print('REGRESSION ' + regression)
+        if len(regressions) > 0:
+            return 1
+        print('no regressions against ' + args.baseline)
+    return 0
+
+
+def _simulate(case: Dict[str, Any], profile: bool) -> Dict[str, Any]:
+    """Run a fresh simulation of <case>, and return its statistics.
+    """
+    random.seed(case['seed'])
+    config = {
+        'num_floors': case['num_floors'],
+        'num_elevators': case['num_elevators'],
+        'elevator_capacity': ELEVATOR_CAPACITY,
+        'num_people_per_round': case['num_people'],
+        'arrival_generator': algorithms.RandomArrivals(case['num_floors'],
+                                                       case['num_people']),
+        'moving_algorithm': ALGORITHMS[case['algorithm']](),
+        'visualize': False,
+        'profile': profile
+    }
+    return Simulation(config).run(case['rounds'])
+
+
+def _key(case: Dict[str, Any]) -> Tuple[Any, ...]:
+    """Return the values identifying benchmark <case>.
+    """
+    return (case['algorithm'], case['num_floors'], case['num_elevators'],
+            case['num_people'], case['seed'], case['rounds'])
+
+
+def _describe(case: Dict[str, Any]) -> str:
+    """Return a short description of benchmark <case>.
+    """
+    return '{} {}f/{}e/{}p seed {}'.format(
+        case['algorithm'], case['num_floors'], case['num_elevators'],
+        case['num_people'], case['seed'])
+
+
+if __name__ == '__main__':
+    sys.exit(main())
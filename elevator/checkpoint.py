@@ -0,0 +1,70 @@
+"""CSC148 Assignment 1 - Checkpoints
+
+=== CSC148 Fall 2018 ===
+Department of Computer Science,
+University of Toronto
+
+=== Module description ===
+This module saves the state of a running simulation to a compressed file and
+restores it, so that a long run can be resumed after being interrupted, or a
+warm mid-run state can be forked into several what-if scenarios.
+
+A checkpoint holds what Simulation.get_state returns: everyone waiting or
+riding, the elevator positions, the statistics so far, the round to run
+next, and the state of the random module, the arrival generator and the
+moving algorithm. It does not hold the configuration: a checkpoint is
+restored into a new simulation built from a configuration, which is how a
+fork can change the moving algorithm or the elevator capacity.
+
+    sim = Simulation(config)
+    sim.run(5000)
+    checkpoint.save(sim, 'morning.ckpt')
+    ...
+    sim = checkpoint.load('morning.ckpt', config)
+    stats = sim.resume(20000)
+"""
+import gzip
+import pickle
+from typing import Any, Dict, Type
+
+from simulation import Simulation
+
+CHECKPOINT_VERSION = 1
+
+
+def save(sim: Simulation, filename: str) -> None:
+    """Save the state of <sim> to the checkpoint file <filename>.
+    """
+    with gzip.open(filename, 'wb') as checkpoint_file:
+        pickle.dump((CHECKPOINT_VERSION, sim.get_state()), checkpoint_file,
+                    protocol=pickle.HIGHEST_PROTOCOL)
+
+
+def load(filename: str, config: Dict[str, Any],
+         simulation_class: Type[Simulation] = Simulation) -> Simulation:
+    """Return a new <simulation_class> built from <config>, in the state saved
+    in the checkpoint file <filename>. Call its resume method to carry on.
+
+    Precondition: <config> has the same number of floors and elevators as the
+    configuration of the saved simulation, and sets compact_population if
+    and only if it did.
+    """
+    with gzip.open(filename, 'rb') as checkpoint_file:
+        version, state = pickle.load(checkpoint_file)
+    if version != CHECKPOINT_VERSION:
+        raise ValueError(filename + ' is not a version ' +
+                         str(CHECKPOINT_VERSION) + ' checkpoint')
+
+    sim = simulation_class(config)
+    sim.set_state(state)
+    return sim
+
+
+if __name__ == '__main__':
+    import python_ta
+
+    python_ta.check_all(config={
+        'extra-imports': ['simulation', 'gzip', 'pickle'],
+        'max-nested-blocks': 4,
+        'disable': ['R0201']
+    })
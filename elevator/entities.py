@@ -20,10 +20,48 @@ in sprites.py; this is to enable their instances to be visualized properly.
 You may not change sprites.py, but are responsible for reading the documentation
 to understand these classes, as well as the abstract methods your classes must
 implement.
+
+When the ELEVATOR_HEADLESS environment variable is set, the display-free
+stand-ins from headless.py are used instead, so that pygame is never
+imported. The sprite classes are chosen when this module is first imported,
+so setting config['visualize'] to False is not enough to keep pygame out:
+set ELEVATOR_HEADLESS before importing the simulation for that.
+
+If sprites.py cannot be imported, the stand-ins are used too, but only
+headless runs may carry on with them: require_sprites raises the import
+error for anything that needs the real sprites, such as a visualized
+simulation.
 """
 from __future__ import annotations
-from typing import List
-from sprites import PersonSprite, ElevatorSprite
+import math
+import os
+from collections import deque
+from bisect import bisect_left, bisect_right, insort
+from typing import Deque, Dict, List, Optional, Tuple
+
+# Why the real sprites are not in use, or None if they are.
+_sprites_error: Optional[ImportError] = None
+if os.environ.get('ELEVATOR_HEADLESS'):
+    from headless import PersonSprite, ElevatorSprite
+    _sprites_error = ImportError('sprites.py was not imported, because '
+                                 'ELEVATOR_HEADLESS is set')
+else:
+    try:
+        from sprites import PersonSprite, ElevatorSprite
+    except ImportError as error:
+        from headless import PersonSprite, ElevatorSprite
+        _sprites_error = error
+
+
+def require_sprites() -> None:
+    """Raise an ImportError if Person and Elevator are using the headless
+    stand-ins rather than the real sprites, so cannot be visualized.
+
+    The error raised is the one that stopped sprites.py from being imported,
+    if there was one.
+    """
+    if _sprites_error is not None:
+        raise _sprites_error
 
 
 class Elevator(ElevatorSprite):
@@ -32,32 +70,192 @@ class Elevator(ElevatorSprite):
     Remember to add additional documentation to this class docstring
     as you add new attributes (and representation invariants).
 
+    Passengers are indexed by target floor, so disembarking at a floor only
+    touches the people going there, and the nearest target floor can be
+    found without looking at every passenger.
+
+    By default an elevator moves at most one floor per round and people get
+    on and off instantly. An elevator can instead be given a higher speed,
+    an acceleration, and a time the doors stay open at each stop, so that
+    the simulation can model express cars and dwell times; see
+    Simulation._move_elevators for how these are applied.
+
     === Attributes ===
-    passengers: A list of the people currently on this elevator
+    passengers: A tuple of the people currently on this elevator,
+                in boarding order (read-only: use board and disembark,
+                or assign a new list, to change who is on it)
     floor: An int indicating the current floor elevator locates
     capacity: An int restricts the maximum passengers elevator can hold
+    speed: the most floors this elevator can travel in one round
+    acceleration: how many floors per round this elevator's speed grows by
+                  each round it keeps moving the same way, or None if it
+                  reaches full speed at once
+    boarding_time: the rounds the doors stay open for each person getting
+                   on or off
+    door_time: the rounds the doors stay open at every stop where somebody
+               gets on or off, on top of boarding_time
+
+    === Private Attributes ===
+    _riders: the people currently on this elevator, in boarding order
+             (only the keys are used; a dict gives O(1) removal)
+    _by_target: maps each target floor of the people on this elevator to
+                those people, in boarding order
+    _targets: the keys of _by_target, in ascending order
+    _motion: the state of this elevator's motion and doors
 
     === Representation invariants ===
      - capacity should not change
      - 1 <= floor <= 6
+     - speed >= 1
+     - 0 <= _motion.velocity <= speed
+     - every person in _riders appears in exactly one list in _by_target,
+       the one for their target floor
+     - no list in _by_target is empty
     """
 
-    passengers: List[Person]
     floor: int
     capacity: int
+    speed: int
+    acceleration: Optional[float]
+    boarding_time: float
+    door_time: float
+    _riders: Dict[Person, None]
+    _by_target: Dict[int, List[Person]]
+    _targets: List[int]
+    _motion: ElevatorMotion
 
-    def __init__(self, capacity: int) -> None:
+    def __init__(self, capacity: int, speed: int = 1,
+                 acceleration: Optional[float] = None,
+                 boarding_time: float = 0, door_time: float = 0) -> None:
         """
         initialize a new elevator
 
         Preconditions:
             capacity>=1
+            speed>=1
+            acceleration is None or acceleration>0
+            boarding_time>=0 and door_time>=0
         """
         ElevatorSprite.__init__(self)
         self.capacity = capacity
-        self.passengers = []
+        self.speed = speed
+        self.acceleration = acceleration
+        self.boarding_time = boarding_time
+        self.door_time = door_time
+        self._riders = {}
+        self._by_target = {}
+        self._targets = []
+        self._motion = ElevatorMotion()
         self.floor = 1
 
+    @property
+    def passengers(self) -> Tuple[Person, ...]:
+        """
+        a tuple of the people currently on this elevator, in boarding order
+        it is a copy of the passenger index, so it is a tuple rather than a
+        list: changing it in place would not change who is on this elevator,
+        and fails instead of doing nothing
+        this builds a new tuple, so prefer first_passenger or nearest_target
+        where they are enough
+        """
+        return tuple(self._riders)
+
+    @passengers.setter
+    def passengers(self, people: List[Person]) -> None:
+        """
+        replace the people on this elevator with people, in the given order
+        """
+        self._riders = {}
+        self._by_target = {}
+        self._targets = []
+        for passenger in people:
+            self._add(passenger)
+
+    def _add(self, passenger: Person) -> None:
+        """
+        put passenger on this elevator, after everyone already on it
+        """
+        self._riders[passenger] = None
+        if passenger.target in self._by_target:
+            self._by_target[passenger.target].append(passenger)
+        else:
+            self._by_target[passenger.target] = [passenger]
+            insort(self._targets, passenger.target)
+
+    def has_target(self, floor: int) -> bool:
+        """
+        return whether anybody on this elevator wants to get off at floor
+        """
+        return floor in self._by_target
+
+    def first_passenger(self) -> Optional[Person]:
+        """
+        return the person who boarded this elevator earliest among the people
+        still on it, or None if it is empty
+        """
+        for passenger in self._riders:
+            return passenger
+        return None
+
+    def nearest_target(self) -> Optional[int]:
+        """
+        return the target floor of the people on this elevator that is
+        closest to its current floor, or None if it is empty
+        to break a tie, the lower floor is chosen
+        """
+        if len(self._targets) == 0:
+            return None
+
+        pos = bisect_left(self._targets, self.floor)
+        if pos == len(self._targets):
+            return self._targets[-1]
+
+        above = self._targets[pos]
+        if pos == 0 or above - self.floor < self.floor - self._targets[pos - 1]:
+            return above
+        return self._targets[pos - 1]
+
+    def next_target(self, floor: int, direction: int) -> Optional[int]:
+        """
+        return the first target floor of the people on this elevator past
+        floor in direction (1 for up, -1 for down), or None if there is none
+        """
+        if direction > 0:
+            pos = bisect_right(self._targets, floor)
+            if pos == len(self._targets):
+                return None
+            return self._targets[pos]
+
+        pos = bisect_left(self._targets, floor)
+        if pos == 0:
+            return None
+        return self._targets[pos - 1]
+
+    def lowest_target(self) -> Optional[int]:
+        """
+        return the lowest target floor of the people on this elevator,
+        or None if it is empty
+        """
+        if len(self._targets) == 0:
+            return None
+        return self._targets[0]
+
+    def highest_target(self) -> Optional[int]:
+        """
+        return the highest target floor of the people on this elevator,
+        or None if it is empty
+        """
+        if len(self._targets) == 0:
+            return None
+        return self._targets[-1]
+
+    def target_floors(self) -> Tuple[int, ...]:
+        """
+        return the target floors of the people on this elevator,
+        in ascending order and without repeats
+        """
+        return tuple(self._targets)
+
     def disembark(self) -> List[Person]:
         """
         disembark passengers when they arrive at target floor
@@ -65,13 +263,12 @@ class Elevator(ElevatorSprite):
         and displays leaving effect and do calculations by reference to it
         in Simulation._handle_leaving
         """
-        exit_list = []
-        for passenger in self.passengers:
-            if self.floor == passenger.target:
-                exit_list.append(passenger)
+        exit_list = self._by_target.pop(self.floor, [])
+        if len(exit_list) > 0:
+            self._targets.remove(self.floor)
 
         for passenger in exit_list:
-            self.passengers.remove(passenger)
+            del self._riders[passenger]
         return exit_list
 
     def board(self, passenger: Person) -> bool:
@@ -81,12 +278,24 @@ class Elevator(ElevatorSprite):
         and append the passenger to elevator.passenger
         if full, return failure boolean and do nothing
         """
-        if len(self.passengers) < self.capacity:
-            self.passengers.append(passenger)
+        if len(self._riders) < self.capacity:
+            self._add(passenger)
             return True
         else:
             return False
 
+    def board_from(self, queue: Deque[Person]) -> List[Person]:
+        """
+        board as many people from the front of queue as there is room for,
+        in queue order, and remove them from queue
+        return the list of people who boarded
+        """
+        num_boarding = min(self.capacity - len(self._riders), len(queue))
+        boarded = [queue.popleft() for _ in range(num_boarding)]
+        for passenger in boarded:
+            self._add(passenger)
+        return boarded
+
     def move(self, direction: int) -> None:
         """
         update the elevator's floor position by adding movement
@@ -96,22 +305,163 @@ class Elevator(ElevatorSprite):
         """
         self.floor += direction
 
+    def count_transfers(self, num_people: int) -> None:
+        """
+        record that num_people got on or off at the current stop
+        """
+        self._motion.transfers += num_people
+
+    def hold_doors(self) -> bool:
+        """
+        start a dwell for the people who got on or off since the last call,
+        lasting door_time plus boarding_time per person, rounded up to whole
+        rounds
+        return whether the doors are still open this round, using up one
+        round of the dwell if so; an elevator with open doors stops
+        """
+        motion = self._motion
+        if motion.transfers > 0:
+            dwell = self.door_time + self.boarding_time * motion.transfers
+            motion.dwell = max(motion.dwell, math.ceil(dwell))
+            motion.transfers = 0
+
+        if motion.dwell > 0:
+            motion.dwell -= 1
+            self.stop()
+            return True
+        return False
+
+    def next_step(self, direction: int) -> int:
+        """
+        speed up to travel in direction this round, from a standstill if
+        that is not the way it was travelling
+        return the most floors this elevator can move this round, which is
+        always at least 1 if direction is not 0
+        """
+        if direction == 0:
+            self.stop()
+            return 0
+        motion = self._motion
+        if direction != motion.heading:
+            motion.velocity = 0.0
+        motion.heading = direction
+
+        if self.acceleration is None:
+            motion.velocity = self.speed
+        else:
+            motion.velocity = min(self.speed,
+                                  motion.velocity + self.acceleration)
+        return max(1, int(motion.velocity))
+
+    def stop(self) -> None:
+        """
+        bring this elevator to a standstill
+        """
+        self._motion.velocity = 0.0
+        self._motion.heading = 0
+
+    def get_motion_state(self) -> tuple:
+        """
+        return the picklable state of this elevator's motion and doors
+        """
+        motion = self._motion
+        return motion.velocity, motion.heading, motion.transfers, motion.dwell
+
+    def set_motion_state(self, state: tuple) -> None:
+        """
+        restore the state returned by get_motion_state
+        """
+        motion = self._motion
+        motion.velocity, motion.heading, motion.transfers, motion.dwell = state
+
     def fullness(self) -> float:
         """
         return a float indicating the fullness of elevator
         used to display effect of elevator sprite
         """
-        return len(self.passengers) / self.capacity
+        return len(self._riders) / self.capacity
+
+
+class ElevatorMotion:
+    """The state of an elevator's motion and doors, for modelling speeds and
+    dwell times.
+
+    === Attributes ===
+    velocity: the speed the elevator is travelling at, in floors per round
+    heading: the direction the elevator is travelling in: 1 for up, -1 for
+             down, and 0 for stopped
+    transfers: the number of people who got on or off at the current stop
+               and have not been accounted for in dwell yet
+    dwell: the number of rounds the doors stay open for
+
+    === Representation invariants ===
+     - velocity >= 0
+     - transfers >= 0
+     - dwell >= 0
+    """
+    velocity: float
+    heading: int
+    transfers: int
+    dwell: int
+
+    def __init__(self) -> None:
+        """
+        initialize the state of a stopped elevator with its doors closed
+        """
+        self.velocity = 0.0
+        self.heading = 0
+        self.transfers = 0
+        self.dwell = 0
+
+
+class RoundClock:
+    """A counter of the rounds completed so far in one simulation.
+
+    Everyone in a simulation shares the same clock, so advancing it by one
+    round increases every waiting or riding person's wait_time by one without
+    visiting any of them.
+
+    === Attributes ===
+    now: the number of rounds completed so far
+
+    === Representation invariants ===
+     - now >= 0
+    """
+    now: int
+
+    def __init__(self) -> None:
+        """
+        initialize a new clock at round 0
+        """
+        self.now = 0
+
+    def tick(self, rounds: int = 1) -> None:
+        """
+        advance the clock by the given number of rounds
+        """
+        self.now += rounds
 
 
 class Person(PersonSprite):
     """A person in the elevator simulation.
 
+    wait_time is not stored directly: it is computed from the round this
+    person arrived in and the round they completed their trip in (or the
+    current round of their simulation's clock, if they are still travelling).
+
     === Attributes ===
     start: the floor this person started on
     target: the floor this person wants to go to
     wait_time: the number of rounds this person has been waiting
 
+    === Private Attributes ===
+    _clock: the clock of the simulation this person arrived in,
+            or None if they have not arrived in a simulation
+    _arrival_round: the clock reading when this person arrived
+    _completion_round: the clock reading when this person reached their
+                       target floor, or None if they are still travelling
+    _extra_wait: rounds of waiting recorded explicitly with record_wait
+
     === Representation invariants ===
      - 1 <= start <= 6
      - 1<= target <= 6
@@ -119,7 +469,10 @@ class Person(PersonSprite):
     """
     start: int
     target: int
-    wait_time: int = 0
+    _clock: Optional[RoundClock]
+    _arrival_round: int
+    _completion_round: Optional[int]
+    _extra_wait: int
 
     def __init__(self, start: int, target: int) -> None:
         """
@@ -128,12 +481,64 @@ class Person(PersonSprite):
         PersonSprite.__init__(self)
         self.start = start
         self.target = target
+        self._clock = None
+        self._arrival_round = 0
+        self._completion_round = None
+        self._extra_wait = 0
+
+    @property
+    def wait_time(self) -> int:
+        """
+        the number of rounds this person has been waiting
+        """
+        if self._clock is None:
+            return self._extra_wait
+        if self._completion_round is None:
+            return self._clock.now - self._arrival_round + self._extra_wait
+        return self._completion_round - self._arrival_round + self._extra_wait
+
+    @wait_time.setter
+    def wait_time(self, value: int) -> None:
+        """
+        set the number of rounds this person has been waiting
+        """
+        self._extra_wait += value - self.wait_time
+
+    @property
+    def arrival_round(self) -> int:
+        """
+        the clock reading when this person arrived
+        """
+        return self._arrival_round
+
+    def arrive(self, clock: RoundClock,
+               arrival_round: Optional[int] = None) -> None:
+        """
+        stamp this person as arriving in the simulation that owns clock,
+        at arrival_round if given (when restoring a saved simulation),
+        or else now
+        from now on, their wait_time grows as the clock advances
+        """
+        self._clock = clock
+        if arrival_round is None:
+            arrival_round = clock.now
+        self._arrival_round = arrival_round
+
+    def complete(self) -> None:
+        """
+        stamp this person as having reached their target floor
+        their wait_time stops growing from now on
+        """
+        if self._clock is not None:
+            self._completion_round = self._clock.now
 
     def record_wait(self) -> None:
         """
-        increment wait_time each round
+        increment wait_time by one round
+        not needed for people who arrived through a simulation, whose
+        wait_time already grows with the simulation's clock
         """
-        self.wait_time += 1
+        self._extra_wait += 1
 
     def get_anger_level(self) -> int:
         """Return this person's anger level.
@@ -146,27 +551,348 @@ class Person(PersonSprite):
             - Level 3: waiting 7-8 rounds
             - Level 4: waiting >= 9 rounds
         """
+        return Person.anger_level_for(self.wait_time)
+
+    @staticmethod
+    def anger_level_for(wait_time: int) -> int:
+        """
+        a static method returning the anger level of someone who has been
+        waiting for wait_time rounds, as described in get_anger_level
+        """
         anger_level = None
 
-        if self.wait_time <= 2:
+        if wait_time <= 2:
             anger_level = 0
-        elif 3 <= self.wait_time <= 4:
+        elif 3 <= wait_time <= 4:
             anger_level = 1
-        elif 5 <= self.wait_time <= 6:
+        elif 5 <= wait_time <= 6:
             anger_level = 2
-        elif 7 <= self.wait_time <= 8:
+        elif 7 <= wait_time <= 8:
             anger_level = 3
-        elif self.wait_time >= 9:
+        elif wait_time >= 9:
             anger_level = 4
 
         return anger_level
 
 
+class AngerHistogram:
+    """The number of people at each anger level in a group of people, kept
+    up to date as people join and leave the group.
+
+    People are counted by the round their wait began (the clock reading
+    minus their wait_time), which does not change while they are in the
+    group. Only the last few of those rounds have people below the highest
+    anger level, so counting the levels only looks those up, however many
+    people there are.
+
+    The counts are only correct if the wait_time of people in the group
+    changes only through the clock (so not through record_wait).
+
+    === Attributes ===
+    size: the number of people in the group
+
+    === Private Attributes ===
+    _clock: the clock of the simulation the people are in
+    _by_wait_start: maps each round in which the wait of somebody in the
+                    group began to the number of such people
+
+    === Representation invariants ===
+     - size == sum of the values of _by_wait_start
+     - every value of _by_wait_start is > 0
+    """
+    size: int
+    _clock: RoundClock
+    _by_wait_start: Dict[int, int]
+
+    def __init__(self, clock: RoundClock) -> None:
+        """
+        initialize an empty histogram of people whose wait_time grows
+        with clock
+        """
+        self.size = 0
+        self._clock = clock
+        self._by_wait_start = {}
+
+    def add(self, person: Person) -> None:
+        """
+        add person to the group
+        """
+        wait_start = self._clock.now - person.wait_time
+        self._by_wait_start[wait_start] = \
+            self._by_wait_start.get(wait_start, 0) + 1
+        self.size += 1
+
+    def remove(self, person: Person) -> None:
+        """
+        remove person from the group
+
+        Precondition: person was added to the group, and not removed since
+        """
+        wait_start = self._clock.now - person.wait_time
+        if self._by_wait_start[wait_start] == 1:
+            del self._by_wait_start[wait_start]
+        else:
+            self._by_wait_start[wait_start] -= 1
+        self.size -= 1
+
+    def counts(self) -> List[int]:
+        """
+        return the number of people in the group at each anger level,
+        indexed by anger level
+        """
+        counts = [0] * (_TOP_ANGER_LEVEL + 1)
+        below_top = 0
+        for wait_time, level in enumerate(_ANGER_LEVELS):
+            num_people = self._by_wait_start.get(self._clock.now - wait_time,
+                                                 0)
+            counts[level] += num_people
+            below_top += num_people
+        counts[_TOP_ANGER_LEVEL] += self.size - below_top
+        return counts
+
+
+# The highest anger level, and the anger level of each wait time below the
+# first one at that level.
+_TOP_ANGER_LEVEL = Person.anger_level_for(2147483647)
+_ANGER_LEVELS = []
+while Person.anger_level_for(len(_ANGER_LEVELS)) < _TOP_ANGER_LEVEL:
+    _ANGER_LEVELS.append(Person.anger_level_for(len(_ANGER_LEVELS)))
+
+
+class WaitingQueues(Dict[int, Deque[Person]]):
+    """The people waiting for an elevator on each floor of a building.
+
+    This is a dictionary mapping each floor number to the queue of people
+    waiting there, in arrival order, which also keeps an index of the floors
+    where somebody is waiting. Moving algorithms use the index to find the
+    lowest or nearest occupied floor without looking at every floor.
+
+    It also keeps the up calls and down calls of the building: the floors
+    where somebody waiting wants to go up, and those where somebody wants
+    to go down. When it is given the simulation's clock, it also keeps a
+    histogram of the anger levels of everyone waiting. Together with the
+    queues themselves, which are in arrival order, these make the length
+    and oldest arrival of each queue, the number of people waiting and how
+    angry they are all quick to look up.
+
+    The indexes only stay correct if people are added and removed through
+    add and board, so the queues should not be changed directly.
+
+    === Private Attributes ===
+    _occupied: a bitset of the occupied floors, where bit i is set
+               exactly when somebody is waiting on floor i
+    _up_calls: a bitset of the floors where somebody waiting wants to go up
+    _down_calls: a bitset of the floors where somebody waiting wants to go
+                 down
+    _num_up: the number of people waiting to go up on each floor, indexed
+             by floor number (index 0 is unused)
+    _num_down: the number of people waiting to go down on each floor,
+               indexed by floor number (index 0 is unused)
+    _anger: the anger levels of everyone waiting, or None if no clock was
+            given
+    _num_waiting: the number of people waiting on all floors
+
+    === Representation invariants ===
+     - the keys are exactly 1, ..., the number of floors
+     - bit i of _occupied is set iff self[i] is not empty
+     - bit i of _up_calls is set iff _num_up[i] > 0
+     - bit i of _down_calls is set iff _num_down[i] > 0
+     - _num_up[i] + _num_down[i] == len(self[i])
+     - _num_waiting == sum of len(self[i])
+    """
+    _occupied: int
+    _up_calls: int
+    _down_calls: int
+    _num_up: List[int]
+    _num_down: List[int]
+    _anger: Optional[AngerHistogram]
+    _num_waiting: int
+
+    def __init__(self, num_floors: int,
+                 clock: Optional[RoundClock] = None) -> None:
+        """
+        initialize empty queues for floors 1 to num_floors
+        if clock is given, also keep a histogram of the anger levels of the
+        people waiting, whose wait_time grows with clock
+        """
+        dict.__init__(self)
+        for floor in range(1, num_floors + 1):
+            self[floor] = deque()
+        self._occupied = 0
+        self._up_calls = 0
+        self._down_calls = 0
+        self._num_up = [0] * (num_floors + 1)
+        self._num_down = [0] * (num_floors + 1)
+        self._anger = None
+        if clock is not None:
+            self._anger = AngerHistogram(clock)
+        self._num_waiting = 0
+
+    def add(self, floor: int, people: List[Person]) -> None:
+        """
+        add people to the back of the queue on floor, in the given order
+        """
+        if len(people) > 0:
+            self[floor].extend(people)
+            self._occupied |= 1 << floor
+            self._num_waiting += len(people)
+            if self._anger is not None:
+                for person in people:
+                    self._anger.add(person)
+
+            num_up = 0
+            for person in people:
+                if person.target > floor:
+                    num_up += 1
+            self._count_calls(floor, num_up, len(people) - num_up)
+
+    def board(self, elevator: Elevator) -> List[Person]:
+        """
+        board as many people as there is room for from the front of the queue
+        on elevator's floor onto elevator
+        return the list of people who boarded
+        """
+        floor = elevator.floor
+        queue = self[floor]
+        boarded = elevator.board_from(queue)
+        if len(queue) == 0:
+            self._occupied &= ~(1 << floor)
+
+        if len(boarded) > 0:
+            num_up = 0
+            for person in boarded:
+                if person.target > floor:
+                    num_up += 1
+            self._count_calls(floor, -num_up, num_up - len(boarded))
+            self._num_waiting -= len(boarded)
+            if self._anger is not None:
+                for person in boarded:
+                    self._anger.remove(person)
+        return boarded
+
+    def num_waiting(self) -> int:
+        """
+        return the number of people waiting on all floors
+        """
+        return self._num_waiting
+
+    def oldest_arrival(self, floor: int) -> Optional[int]:
+        """
+        return the arrival round of the person who has been waiting longest
+        on floor, who is at the front of its queue, or None if nobody is
+        waiting there
+        """
+        if len(self[floor]) == 0:
+            return None
+        return self[floor][0].arrival_round
+
+    def anger_histogram(self) -> Optional[List[int]]:
+        """
+        return the number of people waiting at each anger level, indexed by
+        anger level, or None if these queues were not given a clock
+        """
+        if self._anger is None:
+            return None
+        return self._anger.counts()
+
+    def _count_calls(self, floor: int, up_change: int,
+                     down_change: int) -> None:
+        """
+        change the number of people waiting to go up and down on floor by
+        up_change and down_change, updating the call bitsets to match
+        """
+        bit = 1 << floor
+        self._num_up[floor] += up_change
+        if self._num_up[floor] > 0:
+            self._up_calls |= bit
+        else:
+            self._up_calls &= ~bit
+
+        self._num_down[floor] += down_change
+        if self._num_down[floor] > 0:
+            self._down_calls |= bit
+        else:
+            self._down_calls &= ~bit
+
+    def up_calls(self) -> int:
+        """
+        return a bitset of the floors where anybody waiting wants to go up,
+        where bit i is set for floor i
+        """
+        return self._up_calls
+
+    def down_calls(self) -> int:
+        """
+        return a bitset of the floors where anybody waiting wants to go down,
+        where bit i is set for floor i
+        """
+        return self._down_calls
+
+    def occupied_floors(self) -> int:
+        """
+        return a bitset of the floors where anybody is waiting,
+        where bit i is set for floor i
+        """
+        return self._occupied
+
+    def is_occupied(self, floor: int) -> bool:
+        """
+        return whether anybody is waiting on floor
+        """
+        return (self._occupied >> floor) & 1 == 1
+
+    def lowest_occupied(self) -> Optional[int]:
+        """
+        return the lowest floor where somebody is waiting,
+        or None if nobody is waiting anywhere
+        """
+        if self._occupied == 0:
+            return None
+        return (self._occupied & -self._occupied).bit_length() - 1
+
+    def nearest_occupied(self, floor: int) -> Optional[int]:
+        """
+        return the floor closest to floor where somebody is waiting,
+        or None if nobody is waiting anywhere
+        to break a tie, the lower floor is chosen
+        """
+        if self._occupied == 0:
+            return None
+
+        # the highest occupied floor <= floor, or -1 if there is none
+        below = (self._occupied & ((2 << floor) - 1)).bit_length() - 1
+        higher = self._occupied >> (floor + 1)
+        if higher == 0:
+            return below
+
+        above = floor + (higher & -higher).bit_length()
+        if below == -1 or above - floor < floor - below:
+            return above
+        return below
+
+    def next_occupied(self, floor: int, direction: int) -> Optional[int]:
+        """
+        return the first floor past floor in direction (1 for up, -1 for
+        down) where somebody is waiting, or None if there is none
+        """
+        if direction > 0:
+            higher = self._occupied >> (floor + 1)
+            if higher == 0:
+                return None
+            return floor + (higher & -higher).bit_length()
+
+        lower = self._occupied & ((1 << floor) - 1)
+        if lower == 0:
+            return None
+        return lower.bit_length() - 1
+
+
 if __name__ == '__main__':
     import python_ta
 
     python_ta.check_all(config={
-        'extra-imports': ['sprites'],
+        'extra-imports': ['sprites', 'headless', 'math', 'os', 'bisect',
+                          'collections'],
         'max-nested-blocks': 4,
         'max-attributes': 12,
         'disable': ['R0201']
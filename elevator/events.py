@@ -0,0 +1,122 @@
+"""CSC148 Assignment 1 - Event-driven simulation
+
+=== CSC148 Fall 2018 ===
+Department of Computer Science,
+University of Toronto
+
+=== Module description ===
+This module contains EventSimulation, a Simulation that jumps straight over
+stretches of rounds in which nothing can happen, instead of stepping through
+them one at a time. Simulation itself only skips the stretches where the
+building is empty; EventSimulation also skips the ones where elevators are
+travelling between stops.
+
+After each round, EventSimulation finds the earliest of the next events of
+every kind:
+    - the next round in which people may arrive, as reported by the arrival
+      generator's next_arrival_round
+    - for each elevator, the next round in which it reaches a floor where
+      somebody on it wants to get off, or where somebody is waiting and it
+      has room for them to board
+Every round before the earliest event only moves elevators one floor
+towards their targets, so the simulation moves the elevators, the clock and
+the round count there in one step and carries on from the event.
+
+This is only possible when the moving algorithm's moves_towards_target is
+True, since the engine must predict the moves without making them; with any
+other algorithm, with elevator speeds or dwell times (which the prediction
+does not model), or with a visualizer, EventSimulation runs round by round
+exactly like Simulation. While recording telemetry, it also only skips the
+stretches Simulation skips, where the building is empty, so that a record
+is written for every round in which anybody waits or an elevator moves.
+Either way, it returns the same statistics as Simulation for the same
+inputs.
+"""
+from typing import Optional
+
+from algorithms import MovingAlgorithm
+from entities import Elevator
+from simulation import Simulation
+
+
+class EventSimulation(Simulation):
+    """A simulation that skips the rounds between events.
+    """
+
+    def _next_event_round(self, round_num: int, num_rounds: int) -> int:
+        """Return the first round from <round_num> on in which something other
+        than elevators moving towards their targets happens, or <num_rounds>
+        if nothing does before the end of the run.
+
+        Simulation.run skips the rounds before it.
+        """
+        if self.visualizer is not None or self._models_motion or \
+                not self.moving_algorithm.moves_towards_target:
+            return round_num
+        if self._telemetry is not None:
+            return Simulation._next_event_round(self, round_num, num_rounds)
+
+        next_event = num_rounds
+        next_arrival = self.arrival_generator.next_arrival_round(round_num)
+        if next_arrival is not None:
+            next_event = min(next_event, next_arrival)
+
+        for elevator in self.elevators:
+            rounds = self._rounds_until_stop(elevator)
+            if rounds is not None:
+                next_event = min(next_event, round_num + rounds)
+        return next_event
+
+    def _rounds_until_stop(self, elevator: Elevator) -> Optional[int]:
+        """Return the number of rounds until <elevator> is at a floor where
+        somebody leaves or boards it, if nobody arrives in the meantime, or
+        None if that never happens.
+
+        The first such floor on the way is looked up in the elevator's target
+        index and the occupied floor bitset, rather than walked to.
+        """
+        if self._stops_at(elevator, elevator.floor):
+            return 0
+        target = self._target_floor(elevator)
+        if target is None:
+            return None
+        if target == elevator.floor:
+            return 0
+
+        step = MovingAlgorithm.get_motion_direction(elevator.floor, target)
+        stop = target
+        next_target = elevator.next_target(elevator.floor, step)
+        if next_target is not None and (stop - next_target) * step > 0:
+            stop = next_target
+        if elevator.fullness() < 1.0:
+            next_call = self.waiting.next_occupied(elevator.floor, step)
+            if next_call is not None and (stop - next_call) * step > 0:
+                stop = next_call
+        return abs(stop - elevator.floor)
+
+    def _target_floor(self, elevator: Elevator) -> Optional[int]:
+        """Return the floor the moving algorithm is sending <elevator> to.
+        """
+        return self.moving_algorithm.target_floor(elevator, self.waiting,
+                                                  self.num_floors)
+
+    def _skip_rounds(self, num_rounds: int) -> None:
+        """Advance the simulation by <num_rounds> rounds in which nothing
+        happens but the elevators moving towards their targets.
+        """
+        for elevator in self.elevators:
+            step = MovingAlgorithm.get_motion_direction(
+                elevator.floor, self._target_floor(elevator))
+            elevator.move(step * num_rounds)
+
+        Simulation._skip_rounds(self, num_rounds)
+
+
+if __name__ == '__main__':
+    import python_ta
+
+    python_ta.check_all(config={
+        'extra-imports': ['algorithms', 'entities', 'simulation'],
+        'max-nested-blocks': 4,
+        'disable': ['R0201']
+    })
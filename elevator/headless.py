@@ -0,0 +1,56 @@
+"""CSC148 Assignment 1 - Headless sprites
+
+=== CSC148 Fall 2018 ===
+Department of Computer Science,
+University of Toronto
+
+=== Module description ===
+This module contains display-free stand-ins for the sprite classes in
+sprites.py. They let Person and Elevator be used without importing pygame,
+which is what we want for batch runs on machines with no display.
+
+entities.py picks these classes instead of the real sprites when the
+ELEVATOR_HEADLESS environment variable is set (to anything but an empty
+string), or when sprites.py cannot be imported at all. In the second case,
+only runs that are not visualized can use them; see
+entities.require_sprites.
+"""
+
+
+class PersonSprite:
+    """A person with no visual representation.
+
+    Subclasses must implement get_anger_level, exactly as for the real
+    PersonSprite, so the two are interchangeable.
+    """
+
+    def __init__(self) -> None:
+        """Initialize a new headless person sprite."""
+
+    def get_anger_level(self) -> int:
+        """Return this person's anger level."""
+        raise NotImplementedError
+
+
+class ElevatorSprite:
+    """An elevator with no visual representation.
+
+    Subclasses must implement fullness, exactly as for the real
+    ElevatorSprite, so the two are interchangeable.
+    """
+
+    def __init__(self) -> None:
+        """Initialize a new headless elevator sprite."""
+
+    def fullness(self) -> float:
+        """Return the fraction of this elevator's capacity that is in use."""
+        raise NotImplementedError
+
+
+if __name__ == '__main__':
+    import python_ta
+
+    python_ta.check_all(config={
+        'max-nested-blocks': 4,
+        'disable': ['R0201']
+    })
@@ -0,0 +1,201 @@
+"""CSC148 Assignment 1 - Compact population store
+
+=== CSC148 Fall 2018 ===
+Department of Computer Science,
+University of Toronto
+
+=== Module description ===
+This module contains Population, which stores the riders of a simulation as
+parallel typed arrays (structure-of-arrays) instead of one Person object per
+rider, and Rider, a lightweight view of one rider in a Population.
+
+A Rider only holds a reference to its Population and its index, and answers
+the same questions as a Person (start, target, wait_time, get_anger_level),
+so it can wait in a WaitingQueues, ride an Elevator and be read by the moving
+algorithms. A full, sprite-backed Person is only created for a rider when a
+visualizer (or any other code that really needs one) asks for it.
+"""
+from array import array
+from typing import Dict, List, Union
+
+from entities import Person, RoundClock
+
+# The round number stored for a rider who has not boarded or completed yet.
+NOT_YET = -1
+
+
+class Population:
+    """The riders of one simulation, stored as parallel typed arrays.
+
+    Rider i is described by entry i of every array. Rounds are readings of
+    the simulation's clock, as for Person.
+
+    === Attributes ===
+    starts: the floor each rider started on
+    targets: the floor each rider wants to go to
+    arrival_rounds: the round each rider arrived in
+    board_rounds: the round each rider boarded an elevator in, or NOT_YET
+    completion_rounds: the round each rider reached their target floor in,
+                       or NOT_YET
+
+    === Private Attributes ===
+    _clock: the clock of the simulation these riders arrived in
+    _people: the Person objects created so far for riders, by index
+
+    === Representation invariants ===
+     - all five arrays have the same length
+     - -1 <= board_rounds[i] and -1 <= completion_rounds[i] for every i
+    """
+    starts: array
+    targets: array
+    arrival_rounds: array
+    board_rounds: array
+    completion_rounds: array
+    _clock: RoundClock
+    _people: Dict[int, Person]
+
+    def __init__(self, clock: RoundClock) -> None:
+        """Initialize an empty population of riders arriving by <clock>.
+        """
+        self.starts = array('h')
+        self.targets = array('h')
+        self.arrival_rounds = array('i')
+        self.board_rounds = array('i')
+        self.completion_rounds = array('i')
+        self._clock = clock
+        self._people = {}
+
+    def __len__(self) -> int:
+        """Return the number of riders who have arrived so far.
+        """
+        return len(self.starts)
+
+    def add(self, start: int, target: int) -> 'Rider':
+        """Record a rider going from <start> to <target> as arriving now,
+        and return a view of them.
+        """
+        self.starts.append(start)
+        self.targets.append(target)
+        self.arrival_rounds.append(self._clock.now)
+        self.board_rounds.append(NOT_YET)
+        self.completion_rounds.append(NOT_YET)
+        return Rider(self, len(self.starts) - 1)
+
+    def add_many(self, starts: List[int], targets: List[int]) -> List['Rider']:
+        """Record riders going from starts[i] to targets[i] as arriving now,
+        and return views of them, in the same order.
+        """
+        first = len(self.starts)
+        self.starts.extend(starts)
+        self.targets.extend(targets)
+        self.arrival_rounds.extend([self._clock.now] * len(starts))
+        self.board_rounds.extend([NOT_YET] * len(starts))
+        self.completion_rounds.extend([NOT_YET] * len(starts))
+        return [Rider(self, index)
+                for index in range(first, first + len(starts))]
+
+    def mark_boarded(self, index: int) -> None:
+        """Record rider <index> as boarding an elevator now.
+        """
+        self.board_rounds[index] = self._clock.now
+
+    def mark_completed(self, index: int) -> None:
+        """Record rider <index> as reaching their target floor now.
+        """
+        self.completion_rounds[index] = self._clock.now
+        if index in self._people:
+            self._people.pop(index).complete()
+
+    def wait_time(self, index: int) -> int:
+        """Return the number of rounds rider <index> has been waiting.
+        """
+        end = self.completion_rounds[index]
+        if end == NOT_YET:
+            end = self._clock.now
+        return end - self.arrival_rounds[index]
+
+    def person(self, index: int) -> Person:
+        """Return a full Person for rider <index>, creating it the first time
+        it is asked for.
+
+        The Person reports the same wait_time as the rider for as long as the
+        rider is travelling.
+        """
+        if index not in self._people:
+            person = Person(self.starts[index], self.targets[index])
+            person.arrive(self._clock)
+            person.wait_time = self.wait_time(index)
+            self._people[index] = person
+        return self._people[index]
+
+
+class Rider:
+    """A lightweight view of one rider in a Population.
+
+    === Attributes ===
+    population: the population this rider belongs to
+    index: this rider's index in population
+    """
+    __slots__ = ('population', 'index')
+    population: Population
+    index: int
+
+    def __init__(self, population: Population, index: int) -> None:
+        """Initialize a view of rider <index> in <population>.
+        """
+        self.population = population
+        self.index = index
+
+    @property
+    def start(self) -> int:
+        """The floor this rider started on."""
+        return self.population.starts[self.index]
+
+    @property
+    def target(self) -> int:
+        """The floor this rider wants to go to."""
+        return self.population.targets[self.index]
+
+    @property
+    def arrival_round(self) -> int:
+        """The clock reading when this rider arrived."""
+        return self.population.arrival_rounds[self.index]
+
+    @property
+    def wait_time(self) -> int:
+        """The number of rounds this rider has been waiting."""
+        return self.population.wait_time(self.index)
+
+    def complete(self) -> None:
+        """Record this rider as reaching their target floor now.
+        """
+        self.population.mark_completed(self.index)
+
+    def get_anger_level(self) -> int:
+        """Return this rider's anger level, as for Person.get_anger_level.
+        """
+        return Person.anger_level_for(self.wait_time)
+
+    def to_person(self) -> Person:
+        """Return the full Person for this rider.
+        """
+        return self.population.person(self.index)
+
+
+def as_person(passenger: Union[Person, Rider]) -> Person:
+    """Return <passenger> as a Person: itself if it already is one, or the
+    full Person of a Rider.
+    """
+    if isinstance(passenger, Rider):
+        return passenger.to_person()
+    return passenger
+
+
+if __name__ == '__main__':
+    import python_ta
+
+    python_ta.check_all(config={
+        'extra-imports': ['entities', 'array'],
+        'max-nested-blocks': 4,
+        'disable': ['R0201']
+    })
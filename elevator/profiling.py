@@ -0,0 +1,124 @@
+"""CSC148 Assignment 1 - Stage profiling
+
+=== CSC148 Fall 2018 ===
+Department of Computer Science,
+University of Toronto
+
+=== Module description ===
+This module contains StageProfiler, which records how much wall time each
+stage of a simulation round takes. A Simulation created with
+config['profile'] set to True times every stage of every round (and every
+call to its moving algorithm's move_elevators) with one, and reports the
+results under the 'profile' key of its statistics. Without that setting,
+nothing is timed.
+"""
+import json
+import time
+from typing import Any, Callable, Dict, Optional
+
+
+class StageProfiler:
+    """Cumulative wall time and call counts for the stages of a simulation.
+
+    === Attributes ===
+    stages: for each stage name, a list of its call count, total seconds and
+            longest call in seconds, in the order the stages were first seen
+    rounds: the number of rounds timed
+    round_seconds: the total seconds spent in timed rounds
+    max_round_seconds: the longest round in seconds
+
+    === Private Attributes ===
+    _round_start: the perf_counter reading when the current round started
+    """
+    stages: Dict[str, list]
+    rounds: int
+    round_seconds: float
+    max_round_seconds: float
+    _round_start: float
+
+    def __init__(self) -> None:
+        """Initialize a profiler that has timed nothing.
+        """
+        self.stages = {}
+        self.rounds = 0
+        self.round_seconds = 0.0
+        self.max_round_seconds = 0.0
+        self._round_start = 0.0
+
+    def start_round(self) -> None:
+        """Start timing a round.
+        """
+        self._round_start = time.perf_counter()
+
+    def end_round(self) -> None:
+        """Stop timing the current round.
+        """
+        seconds = time.perf_counter() - self._round_start
+        self.rounds += 1
+        self.round_seconds += seconds
+        if seconds > self.max_round_seconds:
+            self.max_round_seconds = seconds
+
+    def call(self, stage: str, function: Callable, *args: Any) -> Any:
+        """Call <function> with <args>, timing it as part of <stage>, and
+        return what it returns.
+        """
+        start = time.perf_counter()
+        result = function(*args)
+        self.record(stage, time.perf_counter() - start)
+        return result
+
+    def record(self, stage: str, seconds: float) -> None:
+        """Record one call of <stage> that took <seconds>.
+        """
+        if stage not in self.stages:
+            self.stages[stage] = [0, 0.0, 0.0]
+        timing = self.stages[stage]
+        timing[0] += 1
+        timing[1] += seconds
+        if seconds > timing[2]:
+            timing[2] = seconds
+
+    def summary(self) -> Dict[str, Any]:
+        """Return the timings recorded so far as a JSON-compatible dict.
+
+        For every stage, this gives its call count, total seconds, mean
+        seconds per call, longest call, and mean seconds per timed round.
+        """
+        stages = {}
+        for stage, (calls, seconds, longest) in self.stages.items():
+            stages[stage] = {
+                'calls': calls,
+                'total_seconds': seconds,
+                'mean_seconds': seconds / calls,
+                'max_seconds': longest,
+                'seconds_per_round': seconds / max(self.rounds, 1)
+            }
+        return {
+            'rounds': self.rounds,
+            'total_seconds': self.round_seconds,
+            'mean_round_seconds': self.round_seconds / max(self.rounds, 1),
+            'max_round_seconds': self.max_round_seconds,
+            'stages': stages
+        }
+
+    def to_json(self, filename: Optional[str] = None) -> str:
+        """Return the summary as a JSON string, also writing it to <filename>
+        if one is given.
+        """
+        text = json.dumps(self.summary(), indent=2)
+        if filename is not None:
+            with open(filename, 'w') as json_file:
+                json_file.write(text)
+        return text
+
+
+if __name__ == '__main__':
+    import python_ta
+
+    python_ta.check_all(config={
+        'allowed-io': ['to_json'],
+        'extra-imports': ['json', 'time'],
+        'max-nested-blocks': 4,
+        'disable': ['R0201']
+    })
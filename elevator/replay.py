@@ -0,0 +1,405 @@
+"""CSC148 Assignment 1 - Recorded replays
+
+=== CSC148 Fall 2018 ===
+Department of Computer Science,
+University of Toronto
+
+=== Module description ===
+This module separates watching a simulation from running it. A simulation
+records a replay at full speed, and a ReplayPlayer renders it afterwards
+through the usual Visualizer, at any speed and from any round.
+
+To record, pass the ReplayRecorder class as the simulation's visualizer:
+
+    config['visualize'] = False
+    config['visualizer'] = ReplayRecorder
+    sim = Simulation(config)
+    sim.run(1000)
+    save_replay(sim.visualizer.replay, 'run.replay')
+
+That keeps the whole replay in memory: several hundred bytes per round,
+plus a few dozen per arrival, so tens of megabytes for 100000 rounds of a
+small building. To record long runs, give the recorder a file
+to stream each round to as soon as it is over, keeping only that round in
+memory, and close the recorder when the run is done:
+
+    config['visualizer'] = functools.partial(ReplayRecorder,
+                                             filename='run.replay')
+    sim = Simulation(config)
+    sim.run(100000)
+    sim.visualizer.close()
+
+The recorder receives the same calls as a Visualizer, but only notes, for
+each round, who arrived, how many people boarded and left each elevator,
+and where the elevators ended up. That is all a player needs, since people
+board from the front of their floor's queue, and leave an elevator exactly
+at their target floor. So the recorder works whether or not the simulation
+stores people compactly.
+
+Then, to watch rounds 5000 to 5099 at 10 rounds per second:
+
+    player = ReplayPlayer(load_replay('run.replay'))
+    player.seek(5000)
+    player.play(100, speed=10)
+
+A replay file is gzip-compressed JSON lines: a header with the number of
+floors and the number and capacity of the elevators, then one line per
+round: [round number, [[start, target], ...] of the arrivals in order,
+the number who boarded each elevator, the number who left each elevator,
+and the floor of each elevator at the end of the round].
+"""
+import gzip
+import json
+from typing import Any, Callable, Dict, List, Optional, TextIO, Tuple
+
+from algorithms import Direction
+from entities import Person, Elevator, RoundClock, WaitingQueues, \
+    require_sprites
+
+# One round of a replay: its number, the (start, target) pairs of the people
+# arriving, the number who boarded and who left each elevator, and the floor
+# of each elevator at the end of the round.
+ReplayRound = Tuple[int, List[Tuple[int, int]], List[int], List[int],
+                    List[int]]
+
+
+class Replay:
+    """A recording of a simulation.
+
+    === Attributes ===
+    num_floors: the number of floors in the building
+    capacity: the capacity of every elevator
+    num_elevators: the number of elevators
+    rounds: the recorded rounds, in order
+
+    === Representation invariants ===
+     - the round numbers in rounds are consecutive
+    """
+    num_floors: int
+    capacity: int
+    num_elevators: int
+    rounds: List[ReplayRound]
+
+    def __init__(self, num_floors: int, num_elevators: int,
+                 capacity: int) -> None:
+        """Initialize an empty replay of the given building.
+        """
+        self.num_floors = num_floors
+        self.num_elevators = num_elevators
+        self.capacity = capacity
+        self.rounds = []
+
+    def first_round(self) -> int:
+        """Return the number of the first recorded round, or 0 if there is
+        none.
+        """
+        if len(self.rounds) == 0:
+            return 0
+        return self.rounds[0][0]
+
+
+class ReplayRecorder:
+    """A stand-in for the Visualizer that records a replay.
+
+    === Attributes ===
+    replay: the replay recorded so far; when streaming to a file, only the
+            building is recorded here, and its rounds are left empty
+
+    === Private Attributes ===
+    _elevators: the elevators of the simulation
+    _indexes: maps the id of each elevator to its position in _elevators
+    _current: the round being recorded, or None before the first round
+    _file: the replay file rounds are streamed to, or None if they are kept
+           in replay.rounds
+    """
+    replay: Replay
+    _elevators: List[Elevator]
+    _indexes: Dict[int, int]
+    _current: Optional[ReplayRound]
+    _file: Optional[TextIO]
+
+    def __init__(self, elevators: List[Elevator], num_floors: int,
+                 filename: Optional[str] = None) -> None:
+        """Initialize a recorder of a simulation of <elevators> in a
+        building with <num_floors> floors.
+
+        If <filename> is given, each round is written to that replay file
+        once it is over, rather than kept in memory, and the recorder must
+        be closed after the last round.
+        """
+        capacity = elevators[0].capacity if len(elevators) > 0 else 0
+        self.replay = Replay(num_floors, len(elevators), capacity)
+        self._elevators = elevators
+        self._indexes = {id(elevator): i
+                         for i, elevator in enumerate(elevators)}
+        self._current = None
+        self._file = None
+        if filename is not None:
+            self._file = gzip.open(filename, 'wt')
+            _write_header(self._file, self.replay)
+
+    def close(self) -> None:
+        """Write the last round to the replay file, and close it.
+
+        Does nothing if the rounds are kept in memory, or if the recorder is
+        already closed.
+        """
+        if self._file is not None:
+            if self._current is not None:
+                self._file.write(json.dumps(self._current) + '\n')
+            self._file.close()
+            self._file = None
+
+    def render_header(self, round_num: int) -> None:
+        """Start recording round <round_num>.
+        """
+        if self._file is not None and self._current is not None:
+            self._file.write(json.dumps(self._current) + '\n')
+
+        num_elevators = len(self._elevators)
+        self._current = (round_num, [], [0] * num_elevators,
+                         [0] * num_elevators, [])
+        if self._file is None:
+            self.replay.rounds.append(self._current)
+
+    def show_arrivals(self, arrivals: Dict[int, List[Person]]) -> None:
+        """Record the people in <arrivals>.
+        """
+        for people in arrivals.values():
+            for person in people:
+                self._current[1].append((person.start, person.target))
+
+    def show_boarding(self, person: Person, elevator: Elevator) -> None:
+        """Record <person> boarding <elevator>.
+        """
+        self._current[2][self._indexes[id(elevator)]] += 1
+
+    def show_disembarking(self, person: Person, elevator: Elevator) -> None:
+        """Record <person> leaving <elevator>.
+        """
+        self._current[3][self._indexes[id(elevator)]] += 1
+
+    def show_elevator_moves(self, elevators: List[Elevator],
+                            directions: List[Any]) -> None:
+        """Record where the elevators are after moving.
+        """
+        self._current[4].extend(elevator.floor for elevator in elevators)
+
+    def wait(self, duration: float) -> None:
+        """Don't wait: recording runs at full speed.
+        """
+
+
+def save_replay(replay: Replay, filename: str) -> None:
+    """Save <replay> to the file <filename>.
+    """
+    with gzip.open(filename, 'wt') as replay_file:
+        _write_header(replay_file, replay)
+        for replay_round in replay.rounds:
+            replay_file.write(json.dumps(replay_round) + '\n')
+
+
+def _write_header(replay_file: TextIO, replay: Replay) -> None:
+    """Write the header line describing the building of <replay> to
+    <replay_file>.
+    """
+    replay_file.write(json.dumps({
+        'num_floors': replay.num_floors,
+        'num_elevators': replay.num_elevators,
+        'capacity': replay.capacity}) + '\n')
+
+
+def load_replay(filename: str) -> Replay:
+    """Return the replay saved in the file <filename> by save_replay.
+    """
+    with gzip.open(filename, 'rt') as replay_file:
+        header = json.loads(replay_file.readline())
+        replay = Replay(header['num_floors'], header['num_elevators'],
+                        header['capacity'])
+        for line in replay_file:
+            round_num, arrivals, boarded, left, floors = json.loads(line)
+            replay.rounds.append((round_num,
+                                  [tuple(pair) for pair in arrivals],
+                                  boarded, left, floors))
+    return replay
+
+
+class ReplayPlayer:
+    """A player rendering a replay through a visualizer.
+
+    The player rebuilds the people and elevators of the recorded simulation
+    as it goes, so that the visualizer shows them as the simulation had them.
+
+    === Attributes ===
+    replay: the replay being played
+    elevators: the elevators, as they are at the current position
+    waiting: the people waiting, as they are at the current position
+    position: the index in replay.rounds of the next round to play
+    visualizer: the visualizer rendering the replay
+
+    === Private Attributes ===
+    _make_visualizer: makes a visualizer, given the elevators and the
+                      number of floors
+    _clock: the clock of the people in the replay
+    """
+    replay: Replay
+    elevators: List[Elevator]
+    waiting: WaitingQueues
+    position: int
+    visualizer: Any
+    _make_visualizer: Callable[[List[Elevator], int], Any]
+    _clock: RoundClock
+
+    def __init__(self, replay: Replay,
+                 make_visualizer: Optional[
+                     Callable[[List[Elevator], int], Any]] = None) -> None:
+        """Initialize a player of <replay>, at its first round.
+
+        <make_visualizer> is called with the elevators and the number of
+        floors to make the visualizer. By default, it makes a Visualizer
+        (and so imports pygame).
+
+        The player keeps the visualizer it makes. If the visualizer has a
+        reset method, seek calls it to clear the people shown; otherwise,
+        seek has to make a new visualizer.
+        """
+        if make_visualizer is None:
+            require_sprites()
+            from visualizer import Visualizer
+
+            def make_visualizer(elevators: List[Elevator],
+                                num_floors: int) -> Any:
+                """Return a Visualizer of <elevators>."""
+                return Visualizer(elevators, num_floors, True)
+
+        self.replay = replay
+        self.elevators = [Elevator(replay.capacity)
+                          for _ in range(replay.num_elevators)]
+        self._make_visualizer = make_visualizer
+        self._reset()
+        self.visualizer = make_visualizer(self.elevators, replay.num_floors)
+
+    def play(self, num_rounds: Optional[int] = None,
+             speed: float = 1.0) -> None:
+        """Render <num_rounds> rounds from the current position (or up to
+        the end of the replay, if None), showing <speed> rounds per second.
+        """
+        end = len(self.replay.rounds)
+        if num_rounds is not None:
+            end = min(end, self.position + num_rounds)
+        while self.position < end:
+            self._play_round(True)
+            self.visualizer.wait(1 / speed)
+
+    def step(self) -> None:
+        """Render the round at the current position, without waiting.
+        """
+        if self.position < len(self.replay.rounds):
+            self._play_round(True)
+
+    def seek(self, round_num: int) -> None:
+        """Move to round <round_num>, so that it is the next one played, and
+        redraw the building as it was at the start of that round.
+
+        Seeking backwards replays the rounds from the start of the replay
+        (without rendering them), so it takes time in proportion to how far
+        into the replay <round_num> is.
+        """
+        # The round numbers are consecutive, so the round's position follows
+        # from the first one.
+        target = round_num - self.replay.first_round()
+        target = max(0, min(target, len(self.replay.rounds)))
+        if target < self.position:
+            self._reset()
+        while self.position < target:
+            self._play_round(False)
+
+        if hasattr(self.visualizer, 'reset'):
+            self.visualizer.reset()
+        else:
+            self.visualizer = self._make_visualizer(self.elevators,
+                                                    self.replay.num_floors)
+        self.visualizer.render_header(self._clock.now)
+        self.visualizer.show_arrivals(
+            {floor: list(self.waiting[floor]) for floor in self.waiting
+             if len(self.waiting[floor]) > 0})
+        for elevator in self.elevators:
+            for passenger in elevator.passengers:
+                self.visualizer.show_boarding(passenger, elevator)
+
+    def _reset(self) -> None:
+        """Go back to the start of the replay, with nobody in the building.
+        """
+        self.position = 0
+        self._clock = RoundClock()
+        self._clock.now = self.replay.first_round()
+        self.waiting = WaitingQueues(self.replay.num_floors, self._clock)
+        for elevator in self.elevators:
+            elevator.floor = 1
+            elevator.passengers = []
+
+    def _play_round(self, render: bool) -> None:
+        """Play the round at the current position, rendering it if <render>
+        is True, and move on to the next one.
+        """
+        round_num, arrivals, boarded, left, floors = \
+            self.replay.rounds[self.position]
+        self._clock.now = round_num
+        if render:
+            self.visualizer.render_header(round_num)
+
+        arrived = {}
+        for start, target in arrivals:
+            person = Person(start, target)
+            person.arrive(self._clock)
+            arrived.setdefault(start, []).append(person)
+        for floor, people in arrived.items():
+            self.waiting.add(floor, people)
+        if render:
+            self.visualizer.show_arrivals(arrived)
+
+        for elevator, num_left in zip(self.elevators, left):
+            if num_left > 0:
+                for passenger in elevator.disembark():
+                    passenger.complete()
+                    if render:
+                        self.visualizer.show_disembarking(passenger,
+                                                          elevator)
+
+        for elevator, num_boarded in zip(self.elevators, boarded):
+            if num_boarded > 0:
+                for passenger in self.waiting.board(elevator):
+                    if render:
+                        self.visualizer.show_boarding(passenger, elevator)
+
+        directions = []
+        for elevator, floor in zip(self.elevators, floors):
+            directions.append(_direction(floor - elevator.floor))
+            elevator.floor = floor
+        if render:
+            self.visualizer.show_elevator_moves(self.elevators, directions)
+
+        self._clock.tick()
+        self.position += 1
+
+
+def _direction(change: int) -> Direction:
+    """Return the Direction of an elevator that moved <change> floors.
+    """
+    if change > 0:
+        return Direction.UP
+    if change < 0:
+        return Direction.DOWN
+    return Direction.STAY
+
+
+if __name__ == '__main__':
+    import python_ta
+
+    python_ta.check_all(config={
+        'allowed-io': ['save_replay', 'load_replay'],
+        'extra-imports': ['entities', 'visualizer', 'algorithms', 'gzip',
+                          'json'],
+        'max-nested-blocks': 4,
+        'disable': ['R0201']
+    })
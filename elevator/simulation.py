@@ -16,11 +16,18 @@ remove any of the existing attributes.
 """
 # You may import more things from these modules (e.g., additional types from
 # typing), but you may not import from any other modules.
-from typing import Dict, List, Any
+from array import array
+import copy
+import random
+from typing import Dict, List, Any, Optional, Union
 
 import algorithms
-from entities import Person, Elevator
-from visualizer import Visualizer
+from entities import Person, Elevator, RoundClock, WaitingQueues, \
+    AngerHistogram, require_sprites
+from population import Population, Rider, as_person
+from profiling import StageProfiler
+from stats import WaitStats
+from telemetry import RoundRecorder
 
 
 class Simulation:
@@ -32,18 +39,47 @@ class Simulation:
     moving_algorithm: the algorithm used to decide how to move elevators
     num_floors: the number of floors
     visualizer: the Pygame visualizer used to visualize this simulation
+                (or the object made by config['visualizer'] in its place),
+                or None if this simulation is running headless
     waiting: a dictionary of people waiting for an elevator
-             (keys are floor numbers, values are the list of waiting people)
+             (keys are floor numbers, values are the queue of waiting people,
+             in arrival order), which also indexes the occupied floors
     data-record: a dictionary used to represent some statistical data needed
-    during runtime of simulation
+    during runtime of simulation; its "wait_stats" entry summarizes the
+    wait times of everyone who completed their trip in constant memory
+    (with p50/p95/p99 estimates if config['wait_percentiles'] is set)
+
+    === Private Attributes ===
+    _clock: the clock shared by everyone who arrives in this simulation;
+            it advances once per round, which is what grows their wait_time
+    _riding: the anger levels of everyone riding an elevator
+    _population: the compact store of everyone who has arrived, if
+                 config['compact_population'] is set; people then wait and
+                 ride as lightweight Rider views instead of Person objects
+    _next_round: the number of the next round to run
+    _profiler: the profiler timing each stage of each round, if
+               config['profile'] is set, or None
+    _models_motion: whether any elevator is faster than one floor per round
+                    or keeps its doors open at stops, as set by the
+                    config keys 'elevator_speed', 'elevator_acceleration',
+                    'boarding_time' and 'door_time'
+    _telemetry: the recorder writing every round run to the writer in
+                config['telemetry'], if it is set, or None
     """
     arrival_generator: algorithms.ArrivalGenerator
     elevators: List[Elevator]
     moving_algorithm: algorithms.MovingAlgorithm
     num_floors: int
-    visualizer: Visualizer
-    waiting: Dict[int, List[Person]]
+    visualizer: Optional['Visualizer']
+    waiting: WaitingQueues
     data_record: Any
+    _clock: RoundClock
+    _riding: AngerHistogram
+    _population: Optional[Population]
+    _next_round: int
+    _profiler: Optional[StageProfiler]
+    _models_motion: bool
+    _telemetry: Optional[RoundRecorder]
 
     def __init__(self,
                  config: Dict[str, Any]) -> None:
@@ -51,25 +87,57 @@ class Simulation:
         """
         self.data_record = {"total_people_arrived": 0,
                             "total_people_completed": 0, "total_round": 0,
-                            "time_record": []}
+                            "wait_stats": WaitStats(
+                                config.get('wait_percentiles', False))}
         self.num_floors = config["num_floors"]
         self.arrival_generator = config["arrival_generator"]
         self.moving_algorithm = config["moving_algorithm"]
-
+        self._clock = RoundClock()
+        self._riding = AngerHistogram(self._clock)
+        self._next_round = 0
+        self._profiler = None
+        if config.get('profile', False):
+            self._profiler = StageProfiler()
+        self._telemetry = None
+        if config.get('telemetry') is not None:
+            self._telemetry = RoundRecorder(config['telemetry'])
+        self._population = None
+        if config.get('compact_population', False):
+            self._population = Population(self._clock)
+
+        # The speed and acceleration may be given per elevator, as lists,
+        # to model a bank with express cars.
         self.elevators = []
         for i in range(0, config["num_elevators"]):
-            self.elevators.append(
-                Elevator(config["elevator_capacity"]))
+            self.elevators.append(Elevator(
+                config["elevator_capacity"],
+                _for_elevator(config.get('elevator_speed', 1), i),
+                _for_elevator(config.get('elevator_acceleration'), i),
+                config.get('boarding_time', 0), config.get('door_time', 0)))
+        self._models_motion = any(
+            elevator.speed > 1 or elevator.boarding_time > 0 or
+            elevator.door_time > 0 for elevator in self.elevators)
 
-        self.waiting = {}
-        for i in range(1, self.num_floors + 1):
-            self.waiting[i] = []
+        self.waiting = WaitingQueues(self.num_floors, self._clock)
 
         # Initialize the visualizer.
         # Note that this should be called *after* the other attributes
         # have been initialized.
-        self.visualizer = Visualizer(self.elevators, self.num_floors,
-                                     config['visualize'])
+        # When not visualizing we never import the visualizer, and every
+        # visualizer call in the run loop is skipped. (Only ELEVATOR_HEADLESS
+        # keeps pygame out entirely; see entities.py.) When visualizing, the
+        # real sprites must have been imported, or nothing would be drawn.
+        # config['visualizer'] may give another maker of an object with the
+        # Visualizer's methods, such as replay.ReplayRecorder.
+        self.visualizer = None
+        if config.get('visualizer') is not None:
+            self.visualizer = config['visualizer'](self.elevators,
+                                                   self.num_floors)
+        elif config['visualize']:
+            require_sprites()
+            from visualizer import Visualizer
+            self.visualizer = Visualizer(self.elevators, self.num_floors,
+                                         config['visualize'])
 
     ############################################################################
     # Handle rounds of simulation.
@@ -84,38 +152,126 @@ class Simulation:
 
         Note: each run of the simulation starts from the same initial state
         (no people, all elevators are empty and start at floor 1).
+
+        Stretches of rounds where the building is empty, the elevators stay
+        still and no one arrives are skipped over in one step; the statistics
+        are the same as if every round had been run.
         """
-        for i in range(num_rounds):
-            self.visualizer.render_header(i)
+        self._next_round = 0
+        return self.resume(num_rounds)
+
+    def resume(self, num_rounds: int) -> Dict[str, Any]:
+        """Carry on running the simulation from the round after the last one
+        run (for example, after restoring it with set_state), up to but not
+        including round <num_rounds>.
 
-            # Stage 1: generate new arrivals
-            self._generate_arrivals(i)
+        Return the same statistics as run, covering every round run so far.
+        """
+        while self._next_round < num_rounds:
+            self._run_round(self._next_round)
+            self._next_round += 1
+
+            if self._profiler is None:
+                next_event = self._next_event_round(self._next_round,
+                                                    num_rounds)
+            else:
+                next_event = self._profiler.call(
+                    'next_event_round', self._next_event_round,
+                    self._next_round, num_rounds)
+            if next_event > self._next_round:
+                self._skip_rounds(next_event - self._next_round)
+                self._next_round = next_event
 
-            # Stage 2: leave elevators
-            self._handle_leaving()
+        return self._calculate_stats()
 
-            # Stage 3: board elevators
-            self._handle_boarding()
+    def _run_round(self, round_num: int) -> None:
+        """Run every stage of round <round_num> of the simulation.
+        """
+        if self._profiler is not None:
+            self._run_profiled_round(round_num)
+            return
 
-            # Stage 4: move the elevators using the moving algorithm
-            self._move_elevators()
+        if self.visualizer is not None:
+            self.visualizer.render_header(round_num)
 
-            # Increment everyone's wait time by 1
-            for floor in self.waiting:
-                for passenger in self.waiting[floor]:
-                    passenger.record_wait()
+        # Stage 1: generate new arrivals
+        self._generate_arrivals(round_num)
 
-            for elevator in self.elevators:
-                for passenger in elevator.passengers:
-                    passenger.record_wait()
+        # Stage 2: leave elevators
+        self._handle_leaving()
 
-            # Record current round
-            self.data_record["total_round"] += 1
+        # Stage 3: board elevators
+        self._handle_boarding()
 
-            # Pause for 1 second
+        # Stage 4: move the elevators using the moving algorithm
+        self._move_elevators()
+
+        # Increment everyone's wait time by 1
+        self._clock.tick()
+
+        # Record current round
+        self.data_record["total_round"] += 1
+        if self._telemetry is not None:
+            self._record_round(round_num)
+
+        # Pause for 1 second
+        if self.visualizer is not None:
             self.visualizer.wait(1)
 
-        return self._calculate_stats()
+    def _run_profiled_round(self, round_num: int) -> None:
+        """Run every stage of round <round_num> of the simulation, as in
+        _run_round, timing each stage with the profiler.
+        """
+        profiler = self._profiler
+        profiler.start_round()
+        if self.visualizer is not None:
+            profiler.call('render_header', self.visualizer.render_header,
+                          round_num)
+
+        profiler.call('generate_arrivals', self._generate_arrivals, round_num)
+        profiler.call('handle_leaving', self._handle_leaving)
+        profiler.call('handle_boarding', self._handle_boarding)
+        profiler.call('move_elevators', self._move_elevators)
+        profiler.call('advance_clock', self._clock.tick)
+        self.data_record["total_round"] += 1
+        if self._telemetry is not None:
+            profiler.call('telemetry', self._record_round, round_num)
+        profiler.end_round()
+
+        # The pause is not part of the round's work, so it is not timed.
+        if self.visualizer is not None:
+            self.visualizer.wait(1)
+
+    def _next_event_round(self, round_num: int, num_rounds: int) -> int:
+        """Return the first round from <round_num> on that has to be run,
+        or <num_rounds> if none before the end of the run has to be.
+
+        While nobody is waiting or riding an elevator, every round up to the
+        next arrival does nothing, as long as the moving algorithm keeps
+        elevators still when no one is waiting.
+        """
+        if self.visualizer is not None or self._models_motion or \
+                not self.moving_algorithm.moves_towards_target or \
+                self.waiting.lowest_occupied() is not None:
+            return round_num
+
+        for elevator in self.elevators:
+            if elevator.fullness() > 0.0 or \
+                    self.moving_algorithm.target_floor(
+                        elevator, self.waiting, self.num_floors) is not None:
+                return round_num
+
+        next_arrival = self.arrival_generator.next_arrival_round(round_num)
+        if next_arrival is None:
+            return num_rounds
+        return min(next_arrival, num_rounds)
+
+    def _skip_rounds(self, num_rounds: int) -> None:
+        """Advance the simulation by <num_rounds> rounds in which nothing
+        happens.
+        """
+        self._clock.tick(num_rounds)
+        self.data_record["total_round"] += num_rounds
 
     def _generate_arrivals(self, round_num: int) -> None:
         """
@@ -124,15 +280,39 @@ class Simulation:
         display effects
         increment total-people_arrived upon arrival
         """
-        generated_list = self.arrival_generator.generate(round_num)
+        if self._population is not None:
+            generated_list = self._generate_riders(round_num)
+        else:
+            generated_list = self.arrival_generator.generate(round_num)
+            for floor in generated_list:
+                for person in generated_list[floor]:
+                    person.arrive(self._clock)
 
         # record arrival data
         for floor in generated_list:
-            self.waiting[floor].extend(generated_list[floor])
+            self.waiting.add(floor, generated_list[floor])
             self.data_record["total_people_arrived"] += len(
                 generated_list[floor])
 
-        self.visualizer.show_arrivals(generated_list)
+        if self.visualizer is not None:
+            self.visualizer.show_arrivals(
+                {floor: [as_person(person) for person in people]
+                 for floor, people in generated_list.items()})
+
+    def _generate_riders(self, round_num: int) -> Dict[int, List[Person]]:
+        """
+        record the arrivals of round_num in the compact population store,
+        without creating Person objects
+        return the views of the new riders, grouped by start floor
+        """
+        starts, targets = self.arrival_generator.draw(round_num)
+        generated_list = {}
+        for rider in self._population.add_many(starts, targets):
+            if rider.start in generated_list:
+                generated_list[rider.start].append(rider)
+            else:
+                generated_list[rider.start] = [rider]
+        return generated_list
 
     def _handle_leaving(self) -> None:
         """
@@ -145,10 +325,18 @@ class Simulation:
 
             # record wait time for each passenger who disembarked
             for passenger in all_disembark:
-                self.visualizer.show_disembarking(passenger, elevator)
-                self.data_record["time_record"].append(passenger.wait_time)
+                if self.visualizer is not None:
+                    self.visualizer.show_disembarking(as_person(passenger),
+                                                      elevator)
+                self._riding.remove(passenger)
+                passenger.complete()
+                self.data_record["wait_stats"].add(passenger.wait_time)
 
             self.data_record["total_people_completed"] += len(all_disembark)
+            if self._models_motion:
+                elevator.count_transfers(len(all_disembark))
+            if self._telemetry is not None:
+                self._telemetry.left.append(len(all_disembark))
 
     def _handle_boarding(self) -> None:
         """
@@ -159,27 +347,202 @@ class Simulation:
         display effects
         """
         for elevator in self.elevators:
-            pos = 0
-            while pos < len(self.waiting[elevator.floor]):
-                passenger = self.waiting[elevator.floor][pos]
-
-                if elevator.board(passenger):
-                    self.waiting[elevator.floor].remove(passenger)
-                    self.visualizer.show_boarding(passenger, elevator)
-                    pos -= 1
-                else:
-                    break
-                pos += 1
+            boarded = self.waiting.board(elevator)
+            for passenger in boarded:
+                self._riding.add(passenger)
+            if self._models_motion:
+                elevator.count_transfers(len(boarded))
+            if self._telemetry is not None:
+                self._telemetry.boarded.append(len(boarded))
+
+            if self._population is not None:
+                for passenger in boarded:
+                    self._population.mark_boarded(passenger.index)
+
+            if self.visualizer is not None:
+                for passenger in boarded:
+                    self.visualizer.show_boarding(as_person(passenger),
+                                                  elevator)
 
     def _move_elevators(self) -> None:
         """Move the elevators in this simulation.
 
         Use this simulation's moving algorithm to move the elevators.
         """
-        self.visualizer.show_elevator_moves(self.elevators,
-                                            self.moving_algorithm.move_elevators
-                                            (self.elevators, self.waiting,
-                                             self.num_floors))
+        if self._models_motion:
+            starts = [elevator.floor for elevator in self.elevators]
+
+        if self._profiler is None:
+            directions = self.moving_algorithm.move_elevators(
+                self.elevators, self.waiting, self.num_floors)
+        else:
+            directions = self._profiler.call(
+                'algorithm:' + type(self.moving_algorithm).__name__,
+                self.moving_algorithm.move_elevators, self.elevators,
+                self.waiting, self.num_floors)
+        if self._models_motion:
+            self._apply_motion(starts, directions)
+        if self.visualizer is not None:
+            self.visualizer.show_elevator_moves(self.elevators, directions)
+
+    def _apply_motion(self, starts: List[int],
+                      directions: List[algorithms.Direction]) -> None:
+        """Adjust the moves the moving algorithm just made, starting from
+        the floors <starts>, for the elevators' speeds and dwell times.
+
+        Moving algorithms move each elevator by at most one floor, so this
+        undoes the move of an elevator whose doors are still open, and
+        carries an elevator on in the direction it moved for as many floors
+        as its speed allows. It never carries an elevator past a floor where
+        somebody would get on or off, or past the top or bottom floor, and
+        an elevator that stops at such a floor comes to a standstill.
+        <directions> is updated to match.
+        """
+        for i, elevator in enumerate(self.elevators):
+            if elevator.hold_doors():
+                elevator.floor = starts[i]
+                directions[i] = algorithms.Direction.STAY
+                continue
+
+            direction = elevator.floor - starts[i]
+            step = elevator.next_step(direction)
+            for _ in range(1, step):
+                if self._stops_at(elevator, elevator.floor) or \
+                        not 1 <= elevator.floor + direction <= self.num_floors:
+                    break
+                elevator.move(direction)
+            if self._stops_at(elevator, elevator.floor):
+                elevator.stop()
+
+    def _record_round(self, round_num: int) -> None:
+        """Write the telemetry record of round <round_num>, which has just
+        been run.
+        """
+        self._telemetry.record(
+            round_num,
+            [len(self.waiting[floor])
+             for floor in range(1, self.num_floors + 1)],
+            [elevator.floor for elevator in self.elevators],
+            [elevator.fullness() for elevator in self.elevators])
+
+    def _stops_at(self, elevator: Elevator, floor: int) -> bool:
+        """Return whether somebody would leave or board <elevator> if it were
+        at <floor>.
+        """
+        if elevator.has_target(floor):
+            return True
+        return self.waiting.is_occupied(floor) and \
+            elevator.fullness() < 1.0
+
+    def anger_histogram(self) -> List[int]:
+        """Return the number of people in the building (waiting or riding an
+        elevator) at each anger level, indexed by anger level.
+
+        The histograms are kept up to date as people arrive, board and leave,
+        so this takes constant time however many people there are.
+        """
+        return [waiting + riding for waiting, riding in
+                zip(self.waiting.anger_histogram(), self._riding.counts())]
+
+    ############################################################################
+    # Saving and restoring state
+    ############################################################################
+    def get_state(self) -> Dict[str, Any]:
+        """Return a snapshot of the state of this simulation, made only of
+        picklable values (so no sprites), including the state of the random
+        module, the arrival generator and the moving algorithm.
+        """
+        state = {
+            'next_round': self._next_round,
+            'clock': self._clock.now,
+            'data_record': copy.deepcopy(self.data_record),
+            'waiting': {floor: [self._person_state(person)
+                                for person in self.waiting[floor]]
+                        for floor in self.waiting
+                        if len(self.waiting[floor]) > 0},
+            'elevators': [(elevator.floor,
+                           [self._person_state(person)
+                            for person in elevator.passengers])
+                          for elevator in self.elevators],
+            'motion': [elevator.get_motion_state()
+                       for elevator in self.elevators],
+            'population': None,
+            'random': random.getstate(),
+            'arrival_generator': self.arrival_generator.get_state(),
+            'moving_algorithm': self.moving_algorithm.get_state()
+        }
+        if self._population is not None:
+            state['population'] = [
+                self._population.starts, self._population.targets,
+                self._population.arrival_rounds, self._population.board_rounds,
+                self._population.completion_rounds]
+        return state
+
+    def set_state(self, state: Dict[str, Any]) -> None:
+        """Restore a snapshot returned by get_state into this simulation,
+        replacing everyone in it.
+
+        The snapshot may come from a simulation with a different moving
+        algorithm or elevator capacity, to fork a what-if scenario.
+
+        Precondition: this simulation was created with the same number of
+        floors and elevators as the one the snapshot came from, and with
+        config['compact_population'] set if and only if it was.
+        """
+        self._next_round = state['next_round']
+        self._clock.now = state['clock']
+        self.data_record = copy.deepcopy(state['data_record'])
+
+        if self._population is not None:
+            arrays = [array(data.typecode, data)
+                      for data in state['population']]
+            self._population.starts, self._population.targets, \
+                self._population.arrival_rounds, \
+                self._population.board_rounds, \
+                self._population.completion_rounds = arrays
+
+        self.waiting = WaitingQueues(self.num_floors, self._clock)
+        for floor, people in state['waiting'].items():
+            self.waiting.add(floor, [self._restore_person(person)
+                                     for person in people])
+
+        for elevator, (floor, people) in zip(self.elevators,
+                                             state['elevators']):
+            elevator.floor = floor
+            elevator.passengers = [self._restore_person(person)
+                                   for person in people]
+        self._riding = AngerHistogram(self._clock)
+        for elevator in self.elevators:
+            for passenger in elevator.passengers:
+                self._riding.add(passenger)
+        for elevator, motion in zip(self.elevators, state.get('motion', [])):
+            elevator.set_motion_state(motion)
+
+        random.setstate(state['random'])
+        self.arrival_generator.set_state(state['arrival_generator'])
+        self.moving_algorithm.set_state(state['moving_algorithm'])
+
+    def _person_state(self, person: Union[Person, Rider]) -> Any:
+        """Return a picklable record of <person>: a rider's index in the
+        population, or the start, target, arrival round and wait time of a
+        Person.
+        """
+        if isinstance(person, Rider):
+            return person.index
+        return (person.start, person.target, person.arrival_round,
+                person.wait_time)
+
+    def _restore_person(self, record: Any) -> Union[Person, Rider]:
+        """Return the person described by a record from _person_state.
+        """
+        if isinstance(record, int):
+            return Rider(self._population, record)
+
+        start, target, arrival_round, wait_time = record
+        person = Person(start, target)
+        person.arrive(self._clock, arrival_round)
+        person.wait_time = wait_time
+        return person
 
     ############################################################################
     # Statistics calculations
@@ -187,20 +550,35 @@ class Simulation:
     def _calculate_stats(self) -> Dict[str, int]:
         """Report the statistics for the current run of this simulation.
         """
-        # if no time has been recorded, which means zero passenger completed
-        # append the empty time_record by -1 as instructed
-        if len(self.data_record["time_record"]) == 0:
-            self.data_record["time_record"].append(-1)
-
-        return {
+        stats = {
             'num_iterations': self.data_record["total_round"],
             'total_people': self.data_record["total_people_arrived"],
-            'people_completed': self.data_record["total_people_completed"],
-            'max_time': max(self.data_record["time_record"]),
-            'min_time': min(self.data_record["time_record"]),
-            'avg_time': sum(self.data_record["time_record"]) // len(
-                self.data_record["time_record"])
+            'people_completed': self.data_record["total_people_completed"]
         }
+        # if zero passenger completed, the wait time statistics are -1
+        # as instructed
+        stats.update(self.data_record["wait_stats"].summary())
+        if self._models_motion:
+            # people delivered per round, which is what speeds and dwell
+            # times trade off against each other
+            stats['throughput'] = \
+                self.data_record["total_people_completed"] / \
+                max(self.data_record["total_round"], 1)
+        if self._profiler is not None:
+            stats['profile'] = self._profiler.summary()
+        cache = getattr(self.moving_algorithm, 'cache', None)
+        if cache is not None:
+            stats['decision_cache'] = cache.summary()
+        return stats
+
+
+def _for_elevator(value: Any, index: int) -> Any:
+    """Return the value of a per-elevator setting for the elevator at
+    <index>: <value> itself, or its item at <index> if it is a list.
+    """
+    if isinstance(value, (list, tuple)):
+        return value[index]
+    return value
 
 
 def sample_run() -> Dict[str, int]:
@@ -229,8 +607,13 @@ if __name__ == '__main__':
     import python_ta
 
     python_ta.check_all(config={
-        'extra-imports': ['entities', 'visualizer', 'algorithms', 'time'],
+        'extra-imports': ['entities', 'visualizer', 'algorithms', 'time',
+                          'population', 'stats', 'profiling', 'telemetry',
+                          'array', 'copy', 'random'],
         'max-nested-blocks': 4,
-        'max-attributes': 12,
+        # the handout's seven attributes, plus the state of the clock,
+        # the histograms, compact storage, checkpoints, profiling, motion
+        # and telemetry
+        'max-attributes': 14,
         'disable': ['R0201']
     })
@@ -0,0 +1,174 @@
+"""CSC148 Assignment 1 - Streaming statistics
+
+=== CSC148 Fall 2018 ===
+Department of Computer Science,
+University of Toronto
+
+=== Module description ===
+This module contains WaitStats, which summarizes the wait times of the people
+who completed their trips as they complete them, in constant memory, and
+WaitSketch, a fixed-memory histogram WaitStats can use to estimate wait time
+percentiles.
+"""
+from array import array
+from typing import Dict, Optional
+
+# Wait times below 2 ** (_SUB_BITS + 1) get a bucket of their own; above that,
+# every power of two is split into 2 ** _SUB_BITS buckets, so an estimate is
+# never off by more than 1 / 2 ** _SUB_BITS of the true value.
+_SUB_BITS = 5
+_SUB_BUCKETS = 1 << _SUB_BITS
+_EXACT_LIMIT = 2 * _SUB_BUCKETS
+_MAX_BITS = 63
+_NUM_BUCKETS = _EXACT_LIMIT + (_MAX_BITS - _SUB_BITS - 1) * _SUB_BUCKETS
+
+
+class WaitSketch:
+    """A fixed-memory histogram of wait times for estimating percentiles.
+
+    Wait times below 64 are counted exactly. Larger ones are counted in
+    log-linear buckets, 32 per power of two, so estimated percentiles are
+    within about 3% of the true value.
+
+    === Attributes ===
+    count: the number of wait times added
+
+    === Private Attributes ===
+    _buckets: the number of wait times added to each bucket
+
+    === Representation invariants ===
+     - count == sum(_buckets)
+    """
+    count: int
+    _buckets: array
+
+    def __init__(self) -> None:
+        """Initialize an empty sketch.
+        """
+        self.count = 0
+        self._buckets = array('q', bytes(8 * _NUM_BUCKETS))
+
+    def add(self, wait_time: int) -> None:
+        """Add one wait time to this sketch.
+
+        Precondition: 0 <= wait_time < 2 ** 63
+        """
+        self._buckets[_bucket_of(wait_time)] += 1
+        self.count += 1
+
+    def percentile(self, percent: float) -> int:
+        """Return an estimate of the <percent>th percentile (nearest rank) of
+        the wait times added, or -1 if none have been added.
+
+        Precondition: 0 <= percent <= 100
+        """
+        if self.count == 0:
+            return -1
+
+        rank = max(1, -(-percent * self.count // 100))
+        seen = 0
+        for bucket, bucket_count in enumerate(self._buckets):
+            seen += bucket_count
+            if seen >= rank:
+                return _lowest_in(bucket)
+        return _lowest_in(_NUM_BUCKETS - 1)
+
+
+def _bucket_of(wait_time: int) -> int:
+    """Return the bucket of a WaitSketch that <wait_time> is counted in.
+    """
+    if wait_time < _EXACT_LIMIT:
+        return wait_time
+    shift = wait_time.bit_length() - _SUB_BITS - 1
+    return _EXACT_LIMIT + (shift - 1) * _SUB_BUCKETS + \
+        (wait_time >> shift) - _SUB_BUCKETS
+
+
+def _lowest_in(bucket: int) -> int:
+    """Return the smallest wait time counted in <bucket> of a WaitSketch.
+    """
+    if bucket < _EXACT_LIMIT:
+        return bucket
+    shift = (bucket - _EXACT_LIMIT) // _SUB_BUCKETS + 1
+    sub_bucket = (bucket - _EXACT_LIMIT) % _SUB_BUCKETS
+    return (_SUB_BUCKETS + sub_bucket) << shift
+
+
+class WaitStats:
+    """A running summary of the wait times of people who completed their trip.
+
+    === Attributes ===
+    count: the number of wait times added
+    total: the sum of the wait times added
+    minimum: the smallest wait time added, or None if none have been
+    maximum: the largest wait time added, or None if none have been
+    sketch: the histogram used to estimate percentiles, or None if
+            percentiles are not being tracked
+
+    === Representation invariants ===
+     - count >= 0
+     - minimum is None iff maximum is None iff count == 0
+    """
+    count: int
+    total: int
+    minimum: Optional[int]
+    maximum: Optional[int]
+    sketch: Optional[WaitSketch]
+
+    def __init__(self, percentiles: bool = False) -> None:
+        """Initialize an empty summary, which also tracks percentiles if
+        <percentiles> is True.
+        """
+        self.count = 0
+        self.total = 0
+        self.minimum = None
+        self.maximum = None
+        self.sketch = WaitSketch() if percentiles else None
+
+    def add(self, wait_time: int) -> None:
+        """Add the wait time of one person who completed their trip.
+        """
+        self.count += 1
+        self.total += wait_time
+        if self.minimum is None or wait_time < self.minimum:
+            self.minimum = wait_time
+        if self.maximum is None or wait_time > self.maximum:
+            self.maximum = wait_time
+        if self.sketch is not None:
+            self.sketch.add(wait_time)
+
+    def summary(self) -> Dict[str, int]:
+        """Return the max_time, min_time and avg_time statistics (as specified
+        in the assignment handout), plus p50_time, p95_time and p99_time if
+        percentiles are being tracked.
+
+        As instructed, every statistic is -1 if no one has completed a trip.
+        """
+        if self.count == 0:
+            result = {'max_time': -1, 'min_time': -1, 'avg_time': -1}
+        else:
+            result = {'max_time': self.maximum, 'min_time': self.minimum,
+                      'avg_time': self.total // self.count}
+
+        if self.sketch is not None:
+            for percent in (50, 95, 99):
+                result['p' + str(percent) + '_time'] = \
+                    self._clamped(self.sketch.percentile(percent))
+        return result
+
+    def _clamped(self, estimate: int) -> int:
+        """Return <estimate> moved into the range of the wait times added.
+        """
+        if self.count == 0:
+            return estimate
+        return min(max(estimate, self.minimum), self.maximum)
+
+
+if __name__ == '__main__':
+    import python_ta
+
+    python_ta.check_all(config={
+        'extra-imports': ['array'],
+        'max-nested-blocks': 4,
+        'disable': ['R0201']
+    })
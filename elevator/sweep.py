@@ -0,0 +1,141 @@
+"""CSC148 Assignment 1 - Parameter sweeps
+
+=== CSC148 Fall 2018 ===
+Department of Computer Science,
+University of Toronto
+
+=== Module description ===
+This module runs many simulations, one per combination of a configuration
+and a seed, across a pool of worker processes, and collects their statistics
+into a table with one row per run.
+
+Since a configuration has to be sent to a worker process, it cannot contain
+live arrival generator or moving algorithm instances. Instead, the
+'arrival_generator' and 'moving_algorithm' entries of a sweep configuration
+are picklable factories taking no arguments, such as a class or a
+functools.partial of one, for example:
+
+    {'num_floors': 6, 'num_elevators': 2, 'elevator_capacity': 3,
+     'arrival_generator': functools.partial(algorithms.RandomArrivals, 6, 4),
+     'moving_algorithm': algorithms.ShortSighted}
+
+Each worker builds fresh instances from the factories after seeding the
+random module with the run's seed. Every run is headless: the workers are
+started with ELEVATOR_HEADLESS set, so that workers that import the
+simulation afresh keep pygame out. The variable is only set in this process
+while sweep starts its workers, so importing this module changes nothing.
+"""
+from concurrent.futures import ProcessPoolExecutor
+import csv
+import functools
+import itertools
+import os
+import random
+from typing import Any, Dict, List, Optional, Tuple
+
+from simulation import Simulation
+
+
+def grid(base: Dict[str, Any], **options: List[Any]) -> List[Dict[str, Any]]:
+    """Return a copy of <base> for every combination of the given options.
+
+    For example, grid(base, num_elevators=[1, 2], elevator_capacity=[1, 5])
+    returns four configurations.
+    """
+    names = list(options)
+    configs = []
+    for values in itertools.product(*(options[name] for name in names)):
+        config = dict(base)
+        config.update(zip(names, values))
+        configs.append(config)
+    return configs
+
+
+def sweep(configs: List[Dict[str, Any]], seeds: List[int], num_rounds: int,
+          processes: Optional[int] = None) -> List[Dict[str, Any]]:
+    """Run every configuration in <configs> once for every seed in <seeds>,
+    for <num_rounds> rounds each, and return one table row per run.
+
+    Each row holds the configuration (with factories replaced by their
+    names), the seed, and the statistics returned by Simulation.run. Rows are
+    in the order of <configs>, then of <seeds>.
+
+    The runs are spread over <processes> worker processes (by default, one
+    per CPU).
+    """
+    jobs = [(config, seed, num_rounds)
+            for config in configs for seed in seeds]
+    # The workers inherit the environment they are started with; this
+    # process has already imported the simulation, so its own sprites are
+    # not affected.
+    previous = os.environ.get('ELEVATOR_HEADLESS')
+    os.environ['ELEVATOR_HEADLESS'] = '1'
+    try:
+        with ProcessPoolExecutor(max_workers=processes) as executor:
+            return list(executor.map(_run_job, jobs))
+    finally:
+        if previous is None:
+            del os.environ['ELEVATOR_HEADLESS']
+        else:
+            os.environ['ELEVATOR_HEADLESS'] = previous
+
+
+def write_table(rows: List[Dict[str, Any]], filename: str) -> None:
+    """Write the table <rows> returned by sweep to the CSV file <filename>.
+    """
+    columns = []
+    for row in rows:
+        for column in row:
+            if column not in columns:
+                columns.append(column)
+
+    with open(filename, 'w', newline='') as csvfile:
+        writer = csv.DictWriter(csvfile, fieldnames=columns)
+        writer.writeheader()
+        writer.writerows(rows)
+
+
+def _run_job(job: Tuple[Dict[str, Any], int, int]) -> Dict[str, Any]:
+    """Run one simulation of a sweep in this worker process.
+    """
+    config, seed, num_rounds = job
+    random.seed(seed)
+
+    sim_config = dict(config)
+    sim_config['arrival_generator'] = config['arrival_generator']()
+    sim_config['moving_algorithm'] = config['moving_algorithm']()
+    sim_config['visualize'] = False
+
+    row = {name: _describe(value) for name, value in config.items()}
+    row['seed'] = seed
+    row.update(Simulation(sim_config).run(num_rounds))
+    return row
+
+
+def _describe(value: Any) -> Any:
+    """Return <value> as a plain value for a table cell.
+
+    Classes are described by their name, and partials by their function's
+    description followed by their arguments.
+    """
+    if value is None or isinstance(value, (bool, int, float, str)):
+        return value
+    if isinstance(value, functools.partial):
+        args = [repr(arg) for arg in value.args] + \
+            [name + '=' + repr(arg) for name, arg in value.keywords.items()]
+        return _describe(value.func) + '(' + ', '.join(args) + ')'
+    if hasattr(value, '__name__'):
+        return value.__name__
+    return repr(value)
+
+
+if __name__ == '__main__':
+    import python_ta
+
+    python_ta.check_all(config={
+        'allowed-io': ['write_table'],
+        'extra-imports': ['simulation', 'concurrent.futures', 'csv',
+                          'functools', 'itertools', 'os', 'random'],
+        'max-nested-blocks': 4,
+        'disable': ['R0201']
+    })
@@ -0,0 +1,322 @@
+"""CSC148 Assignment 1 - Per-round telemetry
+
+=== CSC148 Fall 2018 ===
+Department of Computer Science,
+University of Toronto
+
+=== Module description ===
+This module contains TelemetryWriter, which streams a record of every round
+of a simulation to a file, and functions that read those files back.
+
+A Simulation created with config['telemetry'] set to a TelemetryWriter
+records, after every round it runs:
+    - round: the round number
+    - queues: the number of people waiting on each floor, from floor 1 up
+    - floors: the floor of each elevator
+    - fullness: the fullness of each elevator
+    - boarded: the number of people who boarded each elevator
+    - left: the number of people who left each elevator
+Rounds that a simulation skips over are not recorded, so the round numbers
+of the records may have gaps. While recording, both Simulation and
+EventSimulation only skip rounds in which the building is empty, so nobody
+waits, boards or leaves in the gaps, and the elevators stay where they are.
+
+The simulation only appends each record to a batch in memory. Full batches
+are handed to a background thread, which encodes and writes them, so the
+simulation never waits for the disk (unless the thread falls max_pending
+batches behind, when it waits for the thread to catch up).
+
+Records are written either as JSON lines, one object per round, or in a
+compact binary format: a 16 byte header (the magic bytes b'ELVM', the
+format version (uint16), the number of floors (uint16) and the number of
+elevators (uint16), and six bytes of padding) followed by fixed-size
+records, each made of the round number (int32), the queue lengths (uint32s),
+the elevator floors (int16s), their fullness (float32s), and the boarded and
+left counts (uint16s), all little-endian.
+
+The writer is owned by the caller, who closes it after the last run:
+
+    with TelemetryWriter('run.jsonl') as telemetry:
+        config['telemetry'] = telemetry
+        Simulation(config).run(1000)
+    series = time_series('run.jsonl')
+"""
+from array import array
+import json
+import queue
+import struct
+import sys
+import threading
+from typing import Any, Dict, Iterator, List, Optional, Tuple
+
+TELEMETRY_MAGIC = b'ELVM'
+TELEMETRY_VERSION = 1
+_HEADER = struct.Struct('<4sHHH6x')
+
+# The range of each integer field of a binary record, as
+# (field, lowest, highest).
+_BINARY_RANGES = [('round', -2 ** 31, 2 ** 31 - 1),
+                  ('queues', 0, 2 ** 32 - 1),
+                  ('floors', -2 ** 15, 2 ** 15 - 1),
+                  ('boarded', 0, 2 ** 16 - 1),
+                  ('left', 0, 2 ** 16 - 1)]
+
+# A round record as passed from the simulation to the writer thread.
+RoundRecord = Tuple[int, List[int], List[int], List[float], List[int],
+                    List[int]]
+
+FIELDS = ['round', 'queues', 'floors', 'fullness', 'boarded', 'left']
+
+
+class TelemetryWriter:
+    """A writer of per-round telemetry that does its I/O on a background
+    thread.
+
+    === Attributes ===
+    filename: the name of the file being written
+    binary: whether records are written in the binary format, rather than
+            as JSON lines
+    batch_size: the number of records handed to the thread at once
+    max_pending: the number of batches that may wait for the thread before
+                 write_round waits for it
+
+    === Private Attributes ===
+    _batch: the records not handed to the thread yet
+    _queue: the batches waiting to be written, followed by None once closed
+    _thread: the thread writing the batches
+    _error: the exception that stopped the thread, if any
+    _closed: whether close has been called
+    """
+    filename: str
+    binary: bool
+    batch_size: int
+    max_pending: int
+    _batch: List[RoundRecord]
+    _queue: queue.Queue
+    _thread: threading.Thread
+    _error: Optional[BaseException]
+    _closed: bool
+
+    def __init__(self, filename: str, binary: bool = False,
+                 batch_size: int = 256, max_pending: int = 64) -> None:
+        """Initialize a new writer to <filename>, and start its thread.
+        """
+        self.filename = filename
+        self.binary = binary
+        self.batch_size = batch_size
+        self.max_pending = max_pending
+        self._batch = []
+        self._queue = queue.Queue(maxsize=max_pending)
+        self._error = None
+        self._closed = False
+        self._thread = threading.Thread(target=self._write_batches,
+                                        name='telemetry', daemon=True)
+        self._thread.start()
+
+    def write_round(self, round_num: int, queues: List[int],
+                    floors: List[int], fullness: List[float],
+                    boarded: List[int], left: List[int]) -> None:
+        """Record one round.
+
+        Every round written to the same file must have the same number of
+        floors and elevators.
+
+        Raise ValueError if this writer is closed, or if it is binary and a
+        value does not fit its field, and raise the exception that stopped
+        the thread, if any.
+        """
+        if self._closed:
+            raise ValueError('telemetry writer to ' + self.filename +
+                             ' is closed')
+        if self._error is not None:
+            raise self._error
+        if self.binary:
+            _check_ranges(round_num, queues, floors, boarded, left)
+        self._batch.append((round_num, queues, floors, fullness, boarded,
+                            left))
+        if len(self._batch) >= self.batch_size:
+            self._queue.put(self._batch)
+            self._batch = []
+
+    def close(self) -> None:
+        """Write out every record, stop the thread and close the file.
+
+        Raise the exception that stopped the thread, if any.
+        """
+        if not self._closed:
+            self._closed = True
+            if len(self._batch) > 0:
+                self._queue.put(self._batch)
+                self._batch = []
+            self._queue.put(None)
+            self._thread.join()
+        if self._error is not None:
+            raise self._error
+
+    def __enter__(self) -> 'TelemetryWriter':
+        """Return this writer, to use in a with statement.
+        """
+        return self
+
+    def __exit__(self, *exc_info: Any) -> None:
+        """Close this writer at the end of a with statement.
+        """
+        self.close()
+
+    def _write_batches(self) -> None:
+        """Write batches from the queue until None is taken from it.
+
+        This runs on the writer's thread. After an error, later batches are
+        taken from the queue but dropped, so that write_round never waits
+        forever. Any exception is caught, since one escaping would end the
+        thread with the queue still being filled.
+        """
+        try:
+            with open(self.filename, 'wb') as telemetry_file:
+                header_written = False
+                batch = self._queue.get()
+                while batch is not None:
+                    if self.binary and not header_written:
+                        first = batch[0]
+                        telemetry_file.write(_HEADER.pack(
+                            TELEMETRY_MAGIC, TELEMETRY_VERSION,
+                            len(first[1]), len(first[2])))
+                        header_written = True
+                    telemetry_file.write(self._encode(batch))
+                    batch = self._queue.get()
+        except Exception as error:  # pylint: disable=broad-except
+            self._error = error
+            while self._queue.get() is not None:
+                pass
+
+    def _encode(self, batch: List[RoundRecord]) -> bytes:
+        """Return the bytes of the records in <batch>.
+        """
+        if not self.binary:
+            return ''.join(json.dumps(dict(zip(FIELDS, record))) + '\n'
+                           for record in batch).encode()
+
+        chunks = []
+        for round_num, queues, floors, fullness, boarded, left in batch:
+            parts = [array('i', [round_num]), array('I', queues),
+                     array('h', floors), array('f', fullness),
+                     array('H', boarded), array('H', left)]
+            if sys.byteorder == 'big':
+                for part in parts:
+                    part.byteswap()
+            chunks.extend(part.tobytes() for part in parts)
+        return b''.join(chunks)
+
+
+class RoundRecorder:
+    """The telemetry of one simulation, recording its rounds to a writer.
+
+    While a round runs, the simulation appends to boarded and left; once the
+    round is over, record writes the round and starts on the next.
+
+    === Attributes ===
+    writer: the writer the rounds are recorded to
+    boarded: the number of people who boarded each elevator in the round
+             being run, so far
+    left: the number of people who left each elevator in the round being
+          run, so far
+    """
+    writer: TelemetryWriter
+    boarded: List[int]
+    left: List[int]
+
+    def __init__(self, writer: TelemetryWriter) -> None:
+        """Initialize a recorder of rounds to <writer>.
+        """
+        self.writer = writer
+        self.boarded = []
+        self.left = []
+
+    def record(self, round_num: int, queues: List[int], floors: List[int],
+               fullness: List[float]) -> None:
+        """Write round <round_num>, which has just been run, with the people
+        who boarded and left during it, and start on the next round.
+        """
+        self.writer.write_round(round_num, queues, floors, fullness,
+                                self.boarded, self.left)
+        self.boarded = []
+        self.left = []
+
+
+def _check_ranges(round_num: int, queues: List[int], floors: List[int],
+                  boarded: List[int], left: List[int]) -> None:
+    """Raise ValueError if a value of the round record does not fit its field
+    in the binary format.
+    """
+    values = {'round': [round_num], 'queues': queues, 'floors': floors,
+              'boarded': boarded, 'left': left}
+    for field, lowest, highest in _BINARY_RANGES:
+        if len(values[field]) > 0 and not \
+                lowest <= min(values[field]) <= max(values[field]) <= highest:
+            raise ValueError('telemetry field {} of round {} is outside '
+                             '[{}, {}]'.format(field, round_num, lowest,
+                                               highest))
+
+
+def read_rounds(filename: str) -> Iterator[Dict[str, Any]]:
+    """Yield the round records in the telemetry file <filename>, in order,
+    as dicts with the keys in FIELDS, whichever format it was written in.
+    """
+    with open(filename, 'rb') as telemetry_file:
+        start = telemetry_file.read(_HEADER.size)
+        if not start.startswith(TELEMETRY_MAGIC):
+            telemetry_file.seek(0)
+            for line in telemetry_file:
+                yield json.loads(line)
+            return
+
+        _, version, num_floors, num_elevators = _HEADER.unpack(start)
+        if version != TELEMETRY_VERSION:
+            raise ValueError(filename + ' is not version ' +
+                             str(TELEMETRY_VERSION) + ' telemetry')
+        layout = [('i', 1), ('I', num_floors), ('h', num_elevators),
+                  ('f', num_elevators), ('H', num_elevators),
+                  ('H', num_elevators)]
+        size = sum(array(code).itemsize * count for code, count in layout)
+
+        data = telemetry_file.read(size)
+        while len(data) == size:
+            values = []
+            offset = 0
+            for code, count in layout:
+                part = array(code)
+                part.frombytes(data[offset:offset + part.itemsize * count])
+                if sys.byteorder == 'big':
+                    part.byteswap()
+                values.append(part.tolist())
+                offset += part.itemsize * count
+            values[0] = values[0][0]
+            yield dict(zip(FIELDS, values))
+            data = telemetry_file.read(size)
+
+
+def time_series(filename: str) -> Dict[str, List[Any]]:
+    """Return the telemetry file <filename> as one list per field in FIELDS,
+    each with one item per recorded round.
+
+    For example, time_series(filename)['queues'][i][0] is the number of
+    people waiting on floor 1 in the i-th recorded round, which is round
+    time_series(filename)['round'][i].
+    """
+    series = {field: [] for field in FIELDS}
+    for record in read_rounds(filename):
+        for field in FIELDS:
+            series[field].append(record[field])
+    return series
+
+
+if __name__ == '__main__':
+    import python_ta
+
+    python_ta.check_all(config={
+        'allowed-io': ['_write_batches', 'read_rounds'],
+        'extra-imports': ['array', 'json', 'queue', 'struct', 'sys',
+                          'threading'],
+        'max-nested-blocks': 4,
+        'disable': ['R0201']
+    })
@@ -0,0 +1,235 @@
+"""CSC148 Assignment 1 - Binary arrival traces
+
+=== CSC148 Fall 2018 ===
+Department of Computer Science,
+University of Toronto
+
+=== Module description ===
+This module contains a compact binary format for arrival traces, a converter
+from the CSV format read by FileArrivals, and TraceArrivals, an arrival
+generator that replays a binary trace through mmap without parsing it.
+
+A trace file is laid out as follows, with every number little-endian:
+    - a 16 byte header: the magic bytes b'ELVT', the format version (uint16),
+      two bytes of padding, the number of rounds with arrivals, R (int32),
+      and the total number of people, P (int32)
+    - the round numbers that have arrivals, in ascending order (R int32s)
+    - an offset table (R + 1 int32s): the people arriving in the i-th round
+      listed are people offsets[i], ..., offsets[i + 1] - 1
+    - the people, as P packed (start, target) pairs of int16s
+"""
+from array import array
+from bisect import bisect_left
+import csv
+import mmap
+import struct
+import sys
+from typing import BinaryIO, Dict, List, Optional, Tuple, Union
+
+from algorithms import ArrivalGenerator
+from entities import Person
+
+TRACE_MAGIC = b'ELVT'
+TRACE_VERSION = 1
+_HEADER = struct.Struct('<4sHxxii')
+
+
+def write_trace(filename: str,
+                arrivals: Dict[int, List[Tuple[int, int]]]) -> None:
+    """Write a binary trace of <arrivals> to <filename>.
+
+    <arrivals> maps each round number to the (start, target) pairs of the
+    people arriving in that round. Rounds with no arrivals are left out.
+
+    Precondition: every floor number fits in an int16.
+    """
+    rounds = array('i')
+    offsets = array('i', [0])
+    pairs = array('h')
+    for round_num in sorted(arrivals):
+        if len(arrivals[round_num]) == 0:
+            continue
+        rounds.append(round_num)
+        for start, target in arrivals[round_num]:
+            pairs.append(start)
+            pairs.append(target)
+        offsets.append(len(pairs) // 2)
+    _write_arrays(filename, rounds, offsets, pairs)
+
+
+def convert_csv(csv_filename: str, trace_filename: str) -> None:
+    """Convert the CSV arrivals file <csv_filename> to a binary trace.
+
+    As in FileArrivals, when there are several lines for the same round the
+    last one is used.
+
+    Precondition:
+        <csv_filename> refers to a valid CSV file, following the specified
+        format and restrictions from the assignment handout.
+    """
+    by_round = {}
+    with open(csv_filename) as csvfile:
+        for line in csv.reader(csvfile):
+            data = array('h', map(int, line[1:]))
+            by_round[int(line[0])] = data
+
+    rounds = array('i')
+    offsets = array('i', [0])
+    pairs = array('h')
+    for round_num in sorted(by_round):
+        if len(by_round[round_num]) < 2:
+            continue
+        rounds.append(round_num)
+        pairs.extend(by_round[round_num][:len(by_round[round_num]) // 2 * 2])
+        offsets.append(len(pairs) // 2)
+    _write_arrays(trace_filename, rounds, offsets, pairs)
+
+
+def _write_arrays(filename: str, rounds: array, offsets: array,
+                  pairs: array) -> None:
+    """Write a trace made of the given round, offset and pair arrays.
+    """
+    if sys.byteorder == 'big':
+        rounds, offsets, pairs = array('i', rounds), array('i', offsets), \
+            array('h', pairs)
+        for data in (rounds, offsets, pairs):
+            data.byteswap()
+
+    with open(filename, 'wb') as tracefile:
+        tracefile.write(_HEADER.pack(TRACE_MAGIC, TRACE_VERSION, len(rounds),
+                                     len(pairs) // 2))
+        rounds.tofile(tracefile)
+        offsets.tofile(tracefile)
+        pairs.tofile(tracefile)
+
+
+class TraceArrivals(ArrivalGenerator):
+    """Generate arrivals by replaying a binary trace file.
+
+    The file is memory-mapped, and each round's people are sliced straight
+    out of the mapping, so nothing is parsed and the operating system only
+    pages in the parts of the trace that are used.
+
+    === Attributes ===
+    max_floor: The maximum floor number for the building.
+               Generated people should not have a starting or target floor
+               beyond this floor.
+    filename: the name of the trace file being replayed
+
+    === Private Attributes ===
+    _file: the open trace file, or None once closed
+    _map: the memory map of _file, or None once closed (or if the trace
+          was copied into memory because this machine is big-endian)
+    _rounds: the round numbers that have arrivals, in ascending order
+    _offsets: the offset table of the trace
+    _pairs: the packed (start, target) pairs of the trace
+
+    === Representation Invariants ===
+    max_floor >= 2
+    len(_offsets) == len(_rounds) + 1
+    """
+    filename: str
+    _file: Optional[BinaryIO]
+    _map: Optional[mmap.mmap]
+    _rounds: Union[memoryview, array]
+    _offsets: Union[memoryview, array]
+    _pairs: Union[memoryview, array]
+
+    def __init__(self, max_floor: int, filename: str) -> None:
+        """Initialize a new TraceArrivals replaying the trace <filename>.
+
+        The num_people attribute is set to None, since the number of arrivals
+        depends on the given trace.
+
+        Precondition:
+            <filename> was written by write_trace or convert_csv.
+        """
+        ArrivalGenerator.__init__(self, max_floor, None)
+        self.filename = filename
+        self._file = open(filename, 'rb')
+        self._map = mmap.mmap(self._file.fileno(), 0, access=mmap.ACCESS_READ)
+
+        magic, version, num_rounds, num_people = _HEADER.unpack_from(self._map)
+        if magic != TRACE_MAGIC or version != TRACE_VERSION:
+            self.close()
+            raise ValueError(filename + ' is not a version ' +
+                             str(TRACE_VERSION) + ' arrival trace')
+
+        rounds_end = _HEADER.size + 4 * num_rounds
+        offsets_end = rounds_end + 4 * (num_rounds + 1)
+        pairs_end = offsets_end + 4 * num_people
+        view = memoryview(self._map)
+        self._rounds = view[_HEADER.size:rounds_end].cast('i')
+        self._offsets = view[rounds_end:offsets_end].cast('i')
+        self._pairs = view[offsets_end:pairs_end].cast('h')
+        view.release()
+
+        if sys.byteorder == 'big':
+            self._copy_swapped()
+
+    def generate(self, round_num: int) -> Dict[int, List[Person]]:
+        """Return the people arriving in round <round_num>.
+
+        Floors where no one arrived are left out.
+        """
+        starts, targets = self.draw(round_num)
+        return self._group_by_start(starts, targets)
+
+    def draw(self, round_num: int) -> Tuple[List[int], List[int]]:
+        """Return the start floors and the target floors of the people
+        arriving in round <round_num>, without creating any Person objects.
+        """
+        pos = bisect_left(self._rounds, round_num)
+        if pos == len(self._rounds) or self._rounds[pos] != round_num:
+            return [], []
+
+        pairs = self._pairs[2 * self._offsets[pos]:2 * self._offsets[pos + 1]]
+        return pairs[0::2].tolist(), pairs[1::2].tolist()
+
+    def next_arrival_round(self, round_num: int) -> Optional[int]:
+        """Return the first round at or after <round_num> with arrivals in the
+        trace, or None if there is none.
+        """
+        pos = bisect_left(self._rounds, round_num)
+        if pos == len(self._rounds):
+            return None
+        return self._rounds[pos]
+
+    def close(self) -> None:
+        """Release the memory map and close the trace file.
+        """
+        for data in (self._rounds, self._offsets, self._pairs):
+            if isinstance(data, memoryview):
+                data.release()
+        self._rounds, self._offsets, self._pairs = \
+            array('i'), array('i', [0]), array('h')
+        if self._map is not None:
+            self._map.close()
+            self._map = None
+        if self._file is not None:
+            self._file.close()
+            self._file = None
+
+    def _copy_swapped(self) -> None:
+        """Replace the little-endian views of the trace with byte-swapped
+        copies, and release the memory map.
+        """
+        rounds = array('i', self._rounds)
+        offsets = array('i', self._offsets)
+        pairs = array('h', self._pairs)
+        for data in (rounds, offsets, pairs):
+            data.byteswap()
+        self.close()
+        self._rounds, self._offsets, self._pairs = rounds, offsets, pairs
+
+
+if __name__ == '__main__':
+    import python_ta
+
+    python_ta.check_all(config={
+        'allowed-io': ['convert_csv', '_write_arrays', '__init__'],
+        'extra-imports': ['algorithms', 'entities', 'array', 'bisect', 'csv',
+                          'mmap', 'struct', 'sys'],
+        'max-nested-blocks': 4,
+        'disable': ['R0201']
+    })